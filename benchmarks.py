@@ -0,0 +1,137 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import time
+import numpy as np
+
+# Keep pygame's import banner out of JSON written to stdout
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+def timeit(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"mean": float(np.mean(times)), "min": float(np.min(times)), "max": float(np.max(times)), "repeats": repeats}
+
+def benchSimulation(counts, steps):
+    from fluidsimulation import FluidSimulation
+
+    smoothing_dist = 0.4
+    spacing = 0.1
+    results = []
+    for count in counts:
+        # Grow the box with the particle count so the number of neighbors per particle stays the same
+        seed_steps = int(np.ceil(np.sqrt(count)))
+        width = np.ceil((seed_steps * spacing * 2) / smoothing_dist) * smoothing_dist
+        sim = FluidSimulation(width=width, height=width, smoothing_dist=smoothing_dist, mu=60,
+                              show_particles=False, particle_count=count)
+        sim.Setup()
+        # Warm up, so the first neighbor list build is not timed
+        sim.Update()
+        timing = timeit(sim.Update, steps)
+        timing.update({"particles": count, "width": float(width), "steps_per_second": 1 / timing["mean"]})
+        results.append(timing)
+        sim.close()
+    return results
+
+def benchVertices(count, repeats):
+    from src.Arrow import Arrow
+    from src.Circle import Circle
+    from src.Line import Line
+    from src.Quad import Quad
+    from src.Tile import Tile
+
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-10, 10, size=(count, 4, 3)).astype(np.float32)
+    builders = {
+        "Circle": lambda p: Circle(radius=0.4, center=p[0]),
+        "Line": lambda p: Line(p[0], p[1]),
+        "Arrow": lambda p: Arrow(p[0], p[1]),
+        "Quad": lambda p: Quad(vertices=p),
+        "Tile": lambda p: Tile(vertices=p),
+    }
+
+    results = {}
+    for name, build in builders.items():
+        # Quad builds its vertices in the constructor, so construction is timed along with createVertices
+        def createAll():
+            for p in points:
+                build(p).createVertices()
+
+        timing = timeit(createAll, repeats)
+        timing.update({"objects": count, "objects_per_second": count / timing["mean"]})
+        results[name] = timing
+    return results
+
+def benchScene(steps_3d):
+    from src.app import App
+    from src.GLBackend import RecordingGLBackend, setBackend
+
+    def test3D(x, y):
+        return np.cos(x) * np.sin(y)
+
+    results = {}
+    # Record GL calls instead of issuing them, so no window or context is needed
+    backend = RecordingGLBackend()
+    previous = setBackend(backend)
+    try:
+        for name, build in (("createAxes3D", lambda app: app.createAxes3D()),
+                            ("draw3DFunction", lambda app: app.draw3DFunction(func=test3D, lower=-3.0, upper=3.0, steps=steps_3d))):
+            # GLUtils prints its startup checks, which would corrupt JSON written to stdout
+            with contextlib.redirect_stdout(io.StringIO()):
+                app = App(1200, 720)
+            start = time.perf_counter()
+            build(app)
+            elapsed = time.perf_counter() - start
+
+            # One frame worth of drawing
+            backend.beginFrame()
+            start = time.perf_counter()
+            app.drawObjects()
+            frame = time.perf_counter() - start
+            backend.endFrame()
+
+            results[name] = {
+                "objects": len(app.scene),
+                "build_seconds": elapsed,
+                "frame_seconds": frame,
+                "frame_gl": backend.frames[-1],
+            }
+    finally:
+        setBackend(previous)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simulation steps, vertex generation and scene building.")
+    parser.add_argument("--particles", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--steps", type=int, default=5, help="Timed simulation steps per particle count")
+    parser.add_argument("--objects", type=int, default=1000, help="Objects per primitive for vertex generation")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--surface-steps", type=int, default=25, help="Grid steps for draw3DFunction")
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "simulation": benchSimulation(args.particles, args.steps),
+        "vertices": benchVertices(args.objects, args.repeats),
+        "scene": benchScene(args.surface_steps),
+    }
+
+    output = json.dumps(results, indent=2)
+    if (args.output):
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,56 @@
-from typing import List
+import json
 import numpy as np
-from src.Circle import Circle
-from src.Line import Line
-from src.Quad import Quad
+from src.Kernels import SmoothingKernels
+from src.NeighborList import NeighborList
+from src.ParallelExecutor import ParallelExecutor, pairForces, sharedPressure
+from src.ParticleVisualizer import ParticleVisualizer
 from src.Simulation import Simulation
-from src.Tile import Tile
-from src.objtypes import CirclePosition, PositionTypes as pt
+from src.SpatialGrid import SpatialGrid
+from src.TrajectoryRecorder import TrajectoryRecorder
 from src.utils import MathUtils as mt
 from src.utils import HashTable as ht
 
-class Particle:
-    def __init__(self, position, velocity, mass):
-        self.position = position
-        self.velocity = velocity
-        self.mass = mass
-
-class Cell:
-    def __init__(self, particles: List[Particle], x, y, _id):
-        self.particles = particles
-        self.x = x
-        self.y = y
-        self._id = _id
+class ParticleStore:
+    def __init__(self, count=0):
+        # Contiguous (N, 3) arrays for the vector quantities
+        self.positions = np.zeros((count, 3), dtype=np.float32)
+        self.velocities = np.zeros((count, 3), dtype=np.float32)
+        self.predicted_positions = np.zeros((count, 3), dtype=np.float32)
+        # (N,) arrays for the scalar quantities
+        self.masses = np.ones(count, dtype=np.float32)
+        self.densities = np.zeros(count, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.masses)
+
+    def add(self, positions, velocities=None, masses=None):
+        # Append a block of particles in one go, growing every array together
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        count = len(positions)
+        if (velocities is None):
+            velocities = np.zeros((count, 3), dtype=np.float32)
+        if (masses is None):
+            masses = np.ones(count, dtype=np.float32)
+
+        start = len(self)
+        self.positions = np.concatenate([self.positions, positions])
+        self.velocities = np.concatenate([self.velocities, np.asarray(velocities, dtype=np.float32).reshape(-1, 3)])
+        self.predicted_positions = np.concatenate([self.predicted_positions, positions])
+        self.masses = np.concatenate([self.masses, np.broadcast_to(np.asarray(masses, dtype=np.float32), (count,))])
+        self.densities = np.concatenate([self.densities, np.zeros(count, dtype=np.float32)])
+        return np.arange(start, start + count)
 
 class FluidSimulation(Simulation):
-    def __init__(self, width, height, smoothing_dist, mu=0.1, show_particles=True, show_background=False):
+    def __init__(self, width, height, smoothing_dist, mu=12, show_particles=True, show_background=False, neighbor_skin=0.1, workers=0, bands=None, 
+                 dimensions=3, density_kernel="spiky", gradient_kernel="spiky", laplacian_kernel="viscosity", 
+                 adaptive_timestep=False, min_dt=1 / 2000, max_dt=1 / 60, cfl=0.4, particle_count=100):
         super().__init__()
-        self.points: List[Circle] = []
-        self.particles: List[Particle] = []
+        # Positions, velocities, predicted positions, masses and densities as arrays
+        self.particles = ParticleStore()
+        # Positions before the last step, for interpolated rendering
+        self.previous_positions = None
         # Hash table to store values
-        self.cells: List[Tile] = [] # Visual cells
-        self.grid: List[Cell] = []  # Hashed cells
-        # Predicted positions
-        self.predicted_positions = []
-        # Densities for each particle
-        self.densities = []
+        self.grid: SpatialGrid = None   # Hashed cells
         # Width of the border
         self.width = width
         # Height of the border
@@ -44,75 +61,103 @@ class FluidSimulation(Simulation):
         self.dampeningConstant = 0.6
         # The time control
         self.deltaTime = 1 / 120
-        # Viscosity factor
+        # Pick deltaTime each step from velocity, acceleration and viscosity bounds
+        self.adaptive_timestep = adaptive_timestep
+        self.min_dt = min_dt
+        self.max_dt = max_dt
+        # Fraction of a smoothing distance a particle may travel in one step
+        self.cfl = cfl
+        # The bound that set deltaTime on the last adaptive step
+        self.dt_limit = None
+        # Pressure and viscosity accelerations from the last step, in units per second squared
+        self.accelerations = None
+        # Fastest rate, per second, at which viscosity pulled a particle toward its neighbors' velocities last step
+        self.viscosity_rate = None
+        # Viscosity factor, per second
         self.mu = mu
-        # Smoothing distance
-        self.smoothingDistance = smoothing_dist
+        # Smoothing kernels, selected by name; setting smoothingDistance updates their constants
+        self.kernels = SmoothingKernels(smoothing_dist, dimensions, density_kernel, gradient_kernel, laplacian_kernel)
+        # Neighbor lists for the force pass, reused until a particle moves more than half the skin
+        self.neighbors = NeighborList(width, height, smoothing_dist, skin=neighbor_skin)
+        # Optional process pool for the density and force phases, split into bands of grid rows
+        self.executor = ParallelExecutor(workers, bands) if (workers > 0) else None
+        # The stages of a step, in order
+        self.phases = [
+            ("timestep", self.chooseTimestep),
+            ("predict", self.applyGravitationalForces),
+            ("grid", self.rebuildGrid),
+            ("density", self.updateDensities),
+            ("forces", self.applyPressureForces),
+            ("integrate", self.updatePositions),
+            ("collide", self.handleCollisions),
+        ]
         # Target density
         self.targetDensity = 30
+        # Pressure per unit of density above the target
+        self.stiffness = 120
+        # Number of particles seeded by Setup
+        self.particle_count = particle_count
         # Show the particles or not 
         self.show_particles = show_particles
         # Show the background or not
         self.show_background = show_background
 
-    def drawBorder(self):
-        particle_radius = 0.08
-        bottom_left = pt.createArray(-self.width - particle_radius, -self.height - particle_radius, 0)
-        bottom_right = pt.createArray(self.width + particle_radius, -self.height - particle_radius, 0)
-        top_right = pt.createArray(self.width + particle_radius, self.height + particle_radius, 0)
-        top_left = pt.createArray(-self.width - particle_radius, self.height + particle_radius, 0)
-
-        border_top = Line(top_left, top_right)
-        border_right = Line(top_right, bottom_right)
-        border_bottom = Line(bottom_right, bottom_left)
-        border_left = Line(bottom_left, top_left)
+    @property
+    def smoothingDistance(self):
+        return self.kernels.smoothingDistance
 
-        self.app.addObject(border_top)
-        self.app.addObject(border_right)
-        self.app.addObject(border_bottom)
-        self.app.addObject(border_left)
+    @smoothingDistance.setter
+    def smoothingDistance(self, smoothing_dist):
+        self.kernels.smoothingDistance = smoothing_dist
+        # The neighbor lists and the grid are sized by the smoothing distance, so both start over with the new one
+        self.neighbors = NeighborList(self.width, self.height, smoothing_dist, skin=self.neighbors.skin)
+        if (self.grid is not None):
+            self.createHashTable()
+            self.grid.rebuild(self.calculatePosition(self.particles.predicted_positions))
 
-    def Render(self):
+    def Setup(self):
         # Create grid of particles
         self.createHashTable()
 
-        # The box of particles to start with
-        lower = -self.width / 4
-        upper = self.height / 4
-        steps = 10
-        x_values = np.linspace(lower, upper, steps)
-        y_values = np.linspace(lower, upper, steps)
-        self.densities = [0] * (steps * steps)
-        for x_index, x_val in enumerate(x_values):
-            for y_index, y_val in enumerate(y_values):
-                position = pt.createArray(x_val, y_val, 0)
-                velocity = pt.createArray(0, 0, 0)
-
-                if (self.show_particles):
-                    point = Circle(radius=0.4, center=position, z_index=50)
-                    self.points.append(point)
-                    self.app.addObject(point)
-
-                particle = Particle(position=position, velocity=velocity, mass=1.0)
-                index = self.calculatePosition(particle)
-                self.grid[index].particles.append(particle)
-
-                self.predicted_positions.append(position)
-                self.particles.append(particle)
-
-        # raise Exception("Halt")
-        self.drawBorder()
+        # The box of particles to start with, unless the particles were already created or restored
+        if (len(self.particles) == 0):
+            lower = -self.width / 4
+            upper = self.height / 4
+            steps = int(np.ceil(np.sqrt(self.particle_count)))
+            x_values = np.linspace(lower, upper, steps)
+            y_values = np.linspace(lower, upper, steps)
+            x_grid, y_grid = np.meshgrid(x_values, y_values, indexing='ij')
+            positions = np.stack([x_grid.ravel(), y_grid.ravel(), np.zeros(steps * steps)], axis=1)
+            self.particles.add(positions[:self.particle_count], masses=1.0)
+
+        self.grid.rebuild(self.calculatePosition(self.particles.positions))
+
+    def Render(self):
+        self.Setup()
+
+        if (self.app and not self.visualizer):
+            self.attachVisualizer(ParticleVisualizer(self.app, self.width, self.height, 
+                                                     cell_size=self.smoothingDistance, 
+                                                     show_particles=self.show_particles, 
+                                                     show_background=self.show_background))
+        if (self.visualizer):
+            self.visualizer.build(self.particles.positions)
 
     def Update(self):
-        for index, particle in enumerate(self.particles):
-            # Handle collisions with walls
-            self.handleCollisions(particle)
-            # Apply gravitational forces
-            self.applyGravitationalForces(index)
-            # Apply pressure forces
-            self.applyPressureForces(index)
-            # Update positions of particles
-            self.updatePositions(index)
+        # Keep the last positions so rendering can interpolate between steps
+        self.previous_positions = self.particles.positions.copy()
+        # Every phase finishes for all particles before the next one starts
+        self.runPhases()
+        self.time += self.deltaTime
+        self.iteration += 1
+
+    def Interpolate(self, alpha):
+        # Move the visuals to a blend of the last two steps
+        if (self.visualizer):
+            positions = self.particles.positions
+            if (self.previous_positions is not None and len(self.previous_positions) == len(positions)):
+                positions = self.previous_positions + ((positions - self.previous_positions) * alpha)
+            self.visualizer.update(positions, self.grid.counts)
     
     def createHashTable(self):
         # Create a grid (hash table) to check neighoring cells more efficiently
@@ -128,209 +173,247 @@ class FluidSimulation(Simulation):
         # print(self.width * 2 / (self.width * 2 / self.smoothingDistance))
         cols = np.linspace(-self.width, self.width, round(self.width * 2 / self.smoothingDistance), endpoint=False)
         rows = np.linspace(self.height, -self.height, round(self.height * 2 / self.smoothingDistance), endpoint=False)
-        result = (2 * self.width / self.smoothingDistance) * (2 * self.height / self.smoothingDistance)
-        grid_range = round(result)
-        self.grid: List[Cell] = []
-        print(grid_range)
-        for i in range(grid_range):
-            x_val = self.smoothingDistance * (i % len(cols))
-            y_val = (2 * self.height) - (self.smoothingDistance * int(i / len(rows)))
-            curr_cell = Cell(particles=[], 
-                                  x=x_val, 
-                                  y=y_val,
-                                  _id=i)
-            self.grid.append(curr_cell)
-            
-        if (self.show_background):
-            for row_index, row in enumerate(rows):
-                for col_index, col in enumerate(cols):
-                    cell = Tile(np.array([pt.createArray(col, row, 0),
-                                        pt.createArray(col + self.smoothingDistance, row, 0),
-                                        pt.createArray(col, row - self.smoothingDistance, 0),
-                                        pt.createArray(col + self.smoothingDistance, row - self.smoothingDistance, 0)], dtype=np.float32),
-                                color=mt.createColor(0, 0, 0),
-                                z_index=0)
-                    self.app.addObject(cell)
-                    self.cells.append(cell)
-
-    def calculatePosition(self, particle):
-        if (isinstance(particle, Particle)):
-            rows = round(2 * self.height / self.smoothingDistance)
-            position = particle.position + np.array([self.width, self.height, 0], dtype=np.float32)
-
-            col = round(position[0] / self.smoothingDistance)
-            row = rows - round(position[1] / self.smoothingDistance) - 1
-
-            if (col == round(2 * self.width / self.smoothingDistance)):
-                col = round(2 * self.width / self.smoothingDistance) - 1
-
-            return col + (rows * row)
-
-    def applyGravitationalForces(self, index):
-        self.particles[index].velocity += mt.Down() * self.gravity * self.deltaTime
-        self.predicted_positions[index] = self.particles[index].position + (self.particles[index].velocity * self.deltaTime)
-
-        self.densities[index] = self.calculateDensity(index)
+        # Cells are keyed row by row from the top left, matching calculatePosition
+        self.grid = SpatialGrid(len(cols), len(rows))
+
+    def calculatePosition(self, positions):
+        # Works on a single (3,) position or an (N, 3) array of positions
+        rows = round(2 * self.height / self.smoothingDistance)
+        cols = round(2 * self.width / self.smoothingDistance)
+        positions = np.asarray(positions, dtype=np.float32)
+        shifted = positions + np.array([self.width, self.height, 0], dtype=np.float32)
+
+        # Cells span [k * smoothingDistance, (k + 1) * smoothingDistance) so the 3x3 neighborhood covers the kernel radius
+        col = np.floor(shifted[..., 0] / self.smoothingDistance).astype(np.int64)
+        row = rows - np.floor(shifted[..., 1] / self.smoothingDistance).astype(np.int64) - 1
+        col = np.clip(col, 0, cols - 1)
+        row = np.clip(row, 0, rows - 1)
+
+        cell_index = col + (cols * row)
+        return int(cell_index) if (cell_index.ndim == 0) else cell_index
+
+    def chooseTimestep(self):
+        if (not self.adaptive_timestep): return
+
+        particles = self.particles
+        h = self.smoothingDistance
+        limits = {"max": self.max_dt}
+
+        # CFL bound: no particle crosses more than a fraction of a smoothing distance per step
+        max_speed = np.sqrt(np.max(np.sum(particles.velocities * particles.velocities, axis=1), initial=0))
+        if (max_speed > 0):
+            limits["velocity"] = self.cfl * h / max_speed
+
+        # Force bound from the largest acceleration, including gravity
+        max_acceleration = self.gravity
+        if (self.accelerations is not None and len(self.accelerations) == len(particles)):
+            max_acceleration += np.sqrt(np.max(np.sum(self.accelerations * self.accelerations, axis=1), initial=0))
+        if (max_acceleration > 0):
+            limits["force"] = 0.25 * np.sqrt(h / max_acceleration)
+
+        # Viscous bound: the explicit update moves a velocity rate * deltaTime of the way to its neighbors',
+        # so keep that at most half way to stay clear of overshooting
+        if (self.viscosity_rate):
+            limits["viscosity"] = 0.5 / self.viscosity_rate
+
+        self.dt_limit = min(limits, key=limits.get)
+        self.deltaTime = float(np.clip(limits[self.dt_limit], self.min_dt, self.max_dt))
+        if (limits[self.dt_limit] < self.min_dt):
+            # The bound asked for less than min_dt, so the clamp is what set the step
+            self.dt_limit = "min"
+
+    def applyGravitationalForces(self):
+        particles = self.particles
+        particles.velocities += mt.Down() * self.gravity * self.deltaTime
+        particles.predicted_positions = particles.positions + (particles.velocities * self.deltaTime)
+
+    def rebuildGrid(self):
+        # Re-sort the particles into their cells by predicted position
+        self.grid.rebuild(self.calculatePosition(self.particles.predicted_positions))
+
+    def updateDensities(self):
+        if (self.executor):
+            arrays = {"positions": self.particles.predicted_positions, "masses": self.particles.masses}
+            self.particles.densities = self.executor.evaluate("density", self.grid, arrays, self.parallelParams(), (len(self.particles),))
+        else:
+            self.particles.densities = self.calculateDensities()
     
-    def applyPressureForces(self, index):
-        net_force = self.calculateForces(index)
-        pressure_acceleration = pt.createArray(0, 0, 0)
-        
-        if (self.densities[index] != 0):
-            pressure_acceleration = net_force / self.densities[index]
-
-        self.particles[index].velocity += pressure_acceleration
-
-    def updatePositions(self, index):
-        oldCell = self.calculatePosition(self.particles[index])
-
-        self.particles[index].position += self.particles[index].velocity * self.deltaTime
-
-        newCell = self.calculatePosition(self.particles[index])
-        # Swap the positions in the table
-        if (oldCell != newCell):
-            self.grid[oldCell].particles.remove(self.particles[index])
-            self.grid[newCell].particles.append(self.particles[index])
-            
-            if (self.show_background):
-                particle_count_new = len(self.grid[newCell].particles)
-                particle_count_old = len(self.grid[oldCell].particles)
-                newColor = mt.createColor(0, 0, np.min([particle_count_new * 35, 255]))
-                oldColor = mt.createColor(0, 0, np.min([particle_count_old * 35, 255]))
-                self.cells[newCell].updateColor(newColor)
-                self.cells[oldCell].updateColor(oldColor)
-
-        if (self.show_particles):
-            newPosition = CirclePosition(center=self.particles[index].position)
-            self.points[index].updatePosition(newPosition)
-
-    def handleCollisions(self, part):
-        if (isinstance(part, Particle)):
-            if (np.abs(part.position[0]) >= self.width):
-                part.position[0] = np.sign(part.position[0]) * self.width
-                part.velocity[0] *= -self.dampeningConstant
-            if (np.abs(part.position[1]) >= self.height):
-                part.position[1] = np.sign(part.position[1]) * self.height
-                part.velocity[1] *= -self.dampeningConstant
-
-    def createCellsToCheck(self, curr_cell_index):
-        this_cell = self.grid[curr_cell_index]
-        rows = round((2 * self.height) / self.smoothingDistance)
-        cols = round((2 * self.width) / self.smoothingDistance)
-
-        # Get all relevant cells - check width
-        if (curr_cell_index % cols == 0):
-            # Left wall
-            top_left_cell = left_cell = bottom_left_cell = None
-        elif (curr_cell_index % cols == cols - 1):
-            # Right wall
-            top_right_cell = right_cell = bottom_right_cell = None
-
-        if (int(curr_cell_index / rows) == 0):
-            # Top wall
-            top_left_cell = top_middle_cell = top_right_cell = None
-        elif (int(curr_cell_index / rows) == rows - 1):
-            # Bottom wall
-            bottom_left_cell = bottom_middle_cell = bottom_right_cell = None
-
-        top_left_cell = self.grid[round(curr_cell_index - cols - 1)] if not ('top_left_cell' in locals()) else None
-        top_middle_cell = self.grid[round(curr_cell_index - cols)] if not ('top_middle_cell' in locals()) else None
-        top_right_cell = self.grid[round(curr_cell_index - cols + 1)] if not ('top_right_cell' in locals()) else None
-        left_cell = self.grid[round(curr_cell_index - 1)] if not ('left_cell' in locals()) else None
-        right_cell = self.grid[round(curr_cell_index + 1)] if not ('right_cell' in locals()) else None
-        bottom_left_cell = self.grid[round(curr_cell_index + cols - 1)] if not ('bottom_left_cell' in locals()) else None
-        bottom_middle_cell = self.grid[round(curr_cell_index + cols)] if not ('bottom_middle_cell' in locals()) else None
-        bottom_right_cell = self.grid[round(curr_cell_index + cols + 1)] if not ('bottom_right_cell' in locals()) else None
-
-        # Put them all in an array
-        cells_to_check = [top_left_cell, 
-                          top_middle_cell, 
-                          top_right_cell, 
-                          left_cell, 
-                          this_cell, 
-                          right_cell, 
-                          bottom_left_cell, 
-                          bottom_middle_cell, 
-                          bottom_right_cell]
-        
-        return cells_to_check
-
-    def calculateForces(self, sampleIndex):
-        net_force = pt.createArray(0, 0, 0)
-        # Pressure forces
-        pressure_force = pt.createArray(0, 0, 0)
-        # Viscosity forces
-        viscosity_force = pt.createArray(0, 0, 0)
+    def applyPressureForces(self):
+        particles = self.particles
+        # Both paths sum the same neighbor list pairs with pairForces, so workers don't change the results
+        self.neighbors.update(particles.predicted_positions)
+        if (self.executor):
+            net_forces = self.executor.evaluatePairs("forces", self.neighbors, self.forceArrays(), self.parallelParams(), (len(particles), 4))
+        else:
+            net_forces = self.calculateForces()
+        densities = particles.densities[:, np.newaxis]
+
+        # Particles with no density get no pressure acceleration. The last column is the viscous weight,
+        # which over density is the rate the viscosity term relaxes each particle's velocity at
+        accelerations = np.divide(net_forces, densities, out=np.zeros_like(net_forces), where=(densities != 0))
+        particles.velocities += accelerations[:, 0:3] * self.deltaTime
+        self.accelerations = accelerations[:, 0:3]
+        self.viscosity_rate = float(np.max(accelerations[:, 3], initial=0))
+
+    def updatePositions(self):
+        particles = self.particles
+        particles.positions += particles.velocities * self.deltaTime
+
+    def handleCollisions(self):
+        particles = self.particles
+        # Clamp every particle that left the box and reflect its velocity
+        for axis, bound in ((0, self.width), (1, self.height)):
+            outside = np.abs(particles.positions[:, axis]) >= bound
+            particles.positions[outside, axis] = np.sign(particles.positions[outside, axis]) * bound
+            particles.velocities[outside, axis] *= -self.dampeningConstant
+
+    def calculateForces(self):
+        # One entry per (sample, neighbor) pair from the neighbor list
+        return pairForces(self.forceArrays(), self.neighbors.owners, self.neighbors.indices, self.parallelParams(), 0, len(self.particles))
+
+    def forceArrays(self):
+        particles = self.particles
+        return {"positions": particles.predicted_positions, 
+                "velocities": particles.velocities, 
+                "masses": particles.masses, 
+                "densities": particles.densities}
+
+    def calculateDensities(self):
+        particles = self.particles
+        densities = np.zeros(len(particles), dtype=np.float32)
+
+        # Every particle in a cell shares the same neighborhood, so evaluate a whole cell at once
+        for cell_index in self.grid.occupiedCells():
+            samples = self.grid.cellParticles(cell_index)
+            neighbors = self.grid.neighbors(cell_index)
+
+            # (samples, neighbors) matrix of pair distances
+            offsets = particles.predicted_positions[neighbors][np.newaxis, :, :] - particles.predicted_positions[samples][:, np.newaxis, :]
+            dists = np.sqrt(np.sum(offsets * offsets, axis=2))
+            influence = self.smoothingKernel(dists)
+
+            densities[samples] = influence @ particles.masses[neighbors]
+
+        return densities
+
+    def getState(self):
+        particles = self.particles
+        return {"positions": particles.positions, "velocities": particles.velocities, "densities": particles.densities}
+
+    def saveCheckpoint(self, path):
+        # The particle arrays plus a JSON header with everything needed to rebuild the simulation
+        metadata = {
+            "version": 1,
+            "iteration": self.iteration,
+            "time": self.time,
+            "parameters": self.checkpointParameters(),
+            "state": {
+                "gravity": self.gravity,
+                "dampeningConstant": self.dampeningConstant,
+                "deltaTime": self.deltaTime,
+                "targetDensity": self.targetDensity,
+                "stiffness": self.stiffness,
+                "dt_limit": self.dt_limit,
+                "viscosity_rate": self.viscosity_rate,
+            },
+        }
+        particles = self.particles
+        # The adaptive force bound reads the last step's accelerations, so they are saved too
+        accelerations = self.accelerations if (self.accelerations is not None) else np.zeros((0, 3), dtype=np.float32)
+        np.savez_compressed(path,
+                            metadata=np.array(json.dumps(metadata)),
+                            positions=particles.positions,
+                            velocities=particles.velocities,
+                            predicted_positions=particles.predicted_positions,
+                            masses=particles.masses,
+                            densities=particles.densities,
+                            accelerations=accelerations)
+
+    def checkpointParameters(self):
+        # Constructor arguments that reproduce this simulation
+        return {
+            "width": self.width,
+            "height": self.height,
+            "smoothing_dist": self.smoothingDistance,
+            "mu": self.mu,
+            "show_particles": self.show_particles,
+            "show_background": self.show_background,
+            "neighbor_skin": self.neighbors.skin,
+            "dimensions": self.kernels.dimensions,
+            "density_kernel": self.kernels.names["density"],
+            "gradient_kernel": self.kernels.names["gradient"],
+            "laplacian_kernel": self.kernels.names["laplacian"],
+            "adaptive_timestep": self.adaptive_timestep,
+            "min_dt": self.min_dt,
+            "max_dt": self.max_dt,
+            "cfl": self.cfl,
+            "particle_count": len(self.particles),
+        }
+
+    @classmethod
+    def fromCheckpoint(cls, path, **overrides):
+        # Overrides replace saved constructor arguments, e.g. show_particles=False or workers=8
+        with np.load(path) as checkpoint:
+            parameters = json.loads(str(checkpoint["metadata"]))["parameters"]
+        parameters.update(overrides)
+        sim = cls(**parameters)
+        sim.restoreCheckpoint(path)
+        return sim
+
+    def restoreCheckpoint(self, path):
+        with np.load(path) as checkpoint:
+            metadata = json.loads(str(checkpoint["metadata"]))
+            particles = ParticleStore()
+            particles.positions = checkpoint["positions"].astype(np.float32)
+            particles.velocities = checkpoint["velocities"].astype(np.float32)
+            particles.predicted_positions = checkpoint["predicted_positions"].astype(np.float32)
+            particles.masses = checkpoint["masses"].astype(np.float32)
+            particles.densities = checkpoint["densities"].astype(np.float32)
+            accelerations = checkpoint["accelerations"].astype(np.float32) if ("accelerations" in checkpoint.files) else None
+
+        if (metadata.get("version") != 1):
+            raise Exception("Please input a valid fluid simulation checkpoint.")
 
-        # Try to do the new grid system instead of the O(n^2)
-        curr_particle = self.particles[sampleIndex]
-        curr_cell_index = int(self.calculatePosition(curr_particle))
+        self.particles = particles
+        self.accelerations = accelerations if (accelerations is not None and len(accelerations) == len(particles)) else None
+        self.iteration = metadata["iteration"]
+        self.time = metadata["time"]
+        for name, value in metadata["state"].items():
+            setattr(self, name, value)
 
-        # Initialize all as none first
-        cells_to_check = self.createCellsToCheck(curr_cell_index)
-        
-        # Ideally faster O(mn)
-        for cell in cells_to_check:
-            if (cell):
-                for particle in cell.particles:
-                    if (particle == self.particles[sampleIndex]): continue
-
-                    # Used for both force calculations
-                    particle_index = self.particles.index(particle)
-                    offset = self.predicted_positions[particle_index] - self.predicted_positions[sampleIndex]
-                    dist = np.linalg.norm(offset)
-                    density = self.densities[particle_index]
-                    dir = offset / dist if dist != 0 else np.array([0, 0, 0], dtype=np.float32)
-
-                    # Viscosity forces
-                    mass = particle.mass
-                    velocity_1 = self.particles[sampleIndex].velocity
-                    velocity_2 = particle.velocity
-                    v_slope = self.smoothingKernelViscosity(dist)
-                    
-                    if (density != 0):
-                        viscosity_force += mass * (velocity_2 - velocity_1) * v_slope / density 
-
-                    # Pressure forces
-                    slope = self.smoothingKernelDerivative(dist)
-                    sharedPressure = self.calculateSharedPressure(density, self.densities[sampleIndex])
-
-                    if (density != 0):
-                        pressure_force += sharedPressure * dir * self.particles[sampleIndex].mass * slope / density
-            
-        net_force = (self.mu * viscosity_force) + pressure_force
-        return net_force
-
-    def calculateDensity(self, sampleIndex):
-        density = 0
-
-        for index, particle in enumerate(self.particles):
-            dist = np.linalg.norm(self.predicted_positions[sampleIndex] - self.predicted_positions[index])
-            influence = self.smoothingKernel(dist)
-
-            density += self.particles[sampleIndex].mass * influence
-        
-        return density
+        # Rebuild the grid straight from the arrays; neighbor lists rebuild on the next step
+        self.createHashTable()
+        self.grid.rebuild(self.calculatePosition(particles.predicted_positions))
+        self.neighbors.reference_positions = None
+        self.previous_positions = None
+
+    def createRecorder(self, path, chunk_frames=256):
+        # Record this simulation's particles; the box size lets a ReplaySimulation draw the border
+        metadata = {"width": self.width, "height": self.height, "cell_size": self.smoothingDistance}
+        # Before Setup there are no particles yet, and Setup will seed particle_count of them
+        count = len(self.particles) if (len(self.particles) > 0) else self.particle_count
+        return TrajectoryRecorder(path, count, chunk_frames=chunk_frames, metadata=metadata)
+
+    def parallelParams(self):
+        return {"smoothing_distance": self.smoothingDistance, 
+                "dimensions": self.kernels.dimensions, 
+                "kernels": self.kernels.names, 
+                "mu": self.mu, 
+                "target_density": self.targetDensity, 
+                "stiffness": self.stiffness}
+
+    def close(self):
+        if (self.executor):
+            self.executor.close()
 
     def calculateSharedPressure(self, density1, density2):
-        pressure1 = density1 - self.targetDensity
-        pressure2 = density2 - self.targetDensity
-        return (pressure1 + pressure2) / 2
+        return sharedPressure(density1, density2, self.parallelParams())
 
     def smoothingKernel(self, dist):
-        if (dist >= self.smoothingDistance): return 0
-
-        volume = 15 / (np.pi * np.pow(self.smoothingDistance, 6))
-        return volume * np.pow(self.smoothingDistance - dist, 3)
+        return self.kernels.density(dist)
     
     def smoothingKernelDerivative(self, dist):
-        if (dist >= self.smoothingDistance): return 0
-
-        volume = -45 / (np.pi * np.pow(self.smoothingDistance, 6))
-        return volume * np.pow(self.smoothingDistance - dist, 2)
+        return self.kernels.gradient(dist)
     
     def smoothingKernelViscosity(self, dist):
-        if (dist >= self.smoothingDistance): return 0
-
-        volume = 45 / (np.pi * np.pow(self.smoothingDistance, 6))
-        return volume * (self.smoothingDistance - dist)
\ No newline at end of file
+        return self.kernels.laplacian(dist)
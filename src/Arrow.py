@@ -4,6 +4,7 @@ import numpy as np
 import ctypes
 from OpenGL.GL.shaders import compileProgram, compileShader
 from OpenGL.GLU import *
+from src.GLBackend import gl
 from src.VObject import VObject
 from src.objtypes import ArrowPosition
 from src.objtypes import Colors
@@ -74,18 +75,14 @@ class Arrow(VObject):
         rod_vertices = self.__createRodVertices()
         head_vertices = self.__createHeadVertices()
 
-        self.vertices = np.append(rod_vertices, head_vertices)
+        self.setVertices(np.append(rod_vertices, head_vertices))
     
     def instantiateGLObjects(self):
         # Create a vertex array object (vao)
-        self.vao = glGenVertexArrays(1)
-        glBindVertexArray(self.vao)
+        self.createVertexArray()
 
-        # Create a vertex buffer object (vbo)
-        self.vbo = glGenBuffers(1)
-        flat_vertices = self.vertices.flatten()
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        glBufferData(GL_ARRAY_BUFFER, flat_vertices.nbytes, flat_vertices, GL_DYNAMIC_DRAW)
+        # Place the vertices in the shared vertex arena
+        offset = self.allocateVertices(6)
 
         # Specify indices - draw both sides so nothing goes out of view
         self.indices = np.array([
@@ -98,40 +95,38 @@ class Arrow(VObject):
         ], dtype=np.uint32)
         
         # Create an element buffer object (ebo)
-        self.ebo = glGenBuffers(1)
-        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
-        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_DYNAMIC_DRAW)
+        self.ebo = gl.glGenBuffers(1)
+        gl.glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        gl.glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_DYNAMIC_DRAW)
+        self.buffer_bytes = self.indices.nbytes
 
         # Tell OpenGL how to interpret the vertex/color data
-        glEnableVertexAttribArray(0)
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
-        glEnableVertexAttribArray(1)
-        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12))
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset))
+        gl.glEnableVertexAttribArray(1)
+        gl.glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset + 12))
     
-    def draw(self):
-        # Bind the vao
-        glBindVertexArray(self.vao)
-        # Rebind partial buffer data in case of any updated vertices
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        flat_vertices = self.vertices.flatten()
-        glBufferSubData(GL_ARRAY_BUFFER, 0, flat_vertices.nbytes, flat_vertices)
-
-        # Draw the Line
-        glDrawElements(GL_TRIANGLES, 18, GL_UNSIGNED_INT, None)
-        glBindVertexArray(0)
+    def render(self):
+        # Arrows too short to see are skipped
+        if (np.linalg.norm(self.end - self.start) > 0.1):
+            gl.glDrawElements(GL_TRIANGLES, 18, GL_UNSIGNED_INT, None)
     
     def updatePosition(self, newPosition=None):
+        changed = False
         if (isinstance(newPosition, ArrowPosition)):
             self.start = newPosition.start
             self.end = newPosition.end
+            changed = True
         # Iterate through animation positions
         if (self.curr_step < len(self.animation_steps)):
             self.start = np.array(self.animation_steps[self.curr_step][0], dtype=np.float32)
             self.end = np.array(self.animation_steps[self.curr_step][1], dtype=np.float32)
             self.curr_step += 1
+            changed = True
 
-        # Update vertex data
-        self.createVertices()
+        # Update vertex data only when the arrow moved
+        if (changed):
+            self.createVertices()
 
     def animate(self, animateTo=ArrowPosition(np.array([0, 0, 0], dtype=np.float32), np.array([0, 0, 0], dtype=np.float32)), func=None, steps=100):
         if (type(animateTo) == ArrowPosition):
@@ -179,7 +174,9 @@ class Arrow(VObject):
             )
     
     def destroy(self):
-        # Destroy vao and vbo
-        glDeleteBuffers(0, (self.vbo,))
+        # Destroy vao and ebo, and give the vertices back to the arena
+        gl.glDeleteVertexArrays(1, (self.vao,))
+        gl.glDeleteBuffers(1, (self.ebo,))
+        self.releaseVertices()
     
     
\ No newline at end of file
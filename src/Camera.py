@@ -17,6 +17,7 @@ class Camera():
         self.theta = 0
         self.phi = 0
         self.utils = MathUtils()
+        self.version = 0                            # Bumped on every change, so the view is only recomputed when it moved
 
         self.updateVectors()
 
@@ -32,6 +33,7 @@ class Camera():
         # Fundamental 3 directions
         self.right = np.cross(self.forwards, globalUp)          # Right vector
         self.up = np.cross(self.right, self.forwards)           # Up vector
+        self.version += 1
 
     def _lookAt(self):
         # Ensure camera is looking down z axis
@@ -47,6 +49,7 @@ class Camera():
     def moveCameraBy(self, newPos):
         newPos = np.array(newPos, dtype=np.float32)
         self.camera_eye += newPos
+        self.version += 1
 
     def spinCamera(self, dTheta, dPhi):
         self.theta += dTheta
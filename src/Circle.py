@@ -4,10 +4,12 @@ import ctypes
 from OpenGL.GL.shaders import compileProgram, compileShader
 from OpenGL.GLU import *
 
+from src.GLBackend import gl
 from src.objtypes import CirclePosition
 from src.VObject import VObject
 
 class Circle(VObject):
+    templates = {}                                  # (quality, hollow) -> unit circle points
 
     def __init__(self, radius, hollow=False, z_index = 0, center = (0.0, 0.0, 0.0)):
         super().__init__()
@@ -17,79 +19,72 @@ class Circle(VObject):
         self.radius = radius / 10                   # Radius of circle
         self.CIRCLE_QUALITY = 25                   # int(500 * SCALING_FACTOR) # How many points the circle has
         self.hollow = hollow                        # If the circle is hollow or not
+        self.primitive = GL_LINE_LOOP if hollow else GL_TRIANGLE_FAN
         self.z_index = z_index
 
-    def createVertices(self):
-        vertices = []
-
-        if (self.hollow):
-            for i in range(self.CIRCLE_QUALITY):
-                angle = i / self.CIRCLE_QUALITY * (2 * np.pi)
-                x = np.cos(angle) * self.radius + self.center[0]
-                y = np.sin(angle) * self.radius + self.center[1]
-                z = 0.0
-                r = 1.0
-                g = 0.0
-                b = 0.0
-                vertices.append([x, y, z, r, g, b])
-
-            self.vertices = np.array(vertices, dtype=np.float32)
-            self.vertex_count = int(len(vertices) / 6)
-        else:
-            vertices.append([*self.center, 1.0, 0.0, 0.0]) # Center point of the circle
+    @classmethod
+    def unitTemplate(cls, quality, hollow):
+        # Unit circle points shared by every circle with the same quality and fill
+        key = (quality, hollow)
+        if (key not in cls.templates):
+            if (hollow):
+                angles = np.arange(quality) / quality * (2 * np.pi)
+                template = np.zeros((quality, 3), dtype=np.float32)
+                template[:, 0] = np.cos(angles)
+                template[:, 1] = np.sin(angles)
+            else:
+                # Center point of the circle, then one extra point to close it
+                angles = np.arange(quality + 1) / quality * (2 * np.pi)
+                template = np.zeros((quality + 2, 3), dtype=np.float32)
+                template[1:, 0] = np.cos(angles)
+                template[1:, 1] = np.sin(angles)
+            template.setflags(write=False)
+            cls.templates[key] = template
+        return cls.templates[key]
 
-            for i in range(self.CIRCLE_QUALITY + 1): # Add one to close the circle
-                angle = i / self.CIRCLE_QUALITY * (2 * np.pi)
-                x = np.cos(angle) * self.radius + self.center[0]
-                y = np.sin(angle) * self.radius + self.center[1]
-                z = 0.0
-                r = 1.0
-                g = 0.0
-                b = 0.0
-                vertices.append([x, y, z, r, g, b])
-
-            self.vertices = np.array(vertices, dtype=np.float32)
-            self.vertex_count = int(len(vertices) / 6)
+    def createVertices(self):
+        template = self.unitTemplate(self.CIRCLE_QUALITY, self.hollow)
+
+        vertices = np.empty((len(template), 6), dtype=np.float32)
+        vertices[:, 0:3] = template * self.radius
+        vertices[:, 0:2] += np.asarray(self.center, dtype=np.float32)[:2]
+        vertices[:, 3:6] = (1.0, 0.0, 0.0)
+        self.setVertices(vertices)
+        self.vertex_count = len(template)
+
+    def moveTo(self, center):
+        # Moving only translates the existing points, the shape stays the same
+        center = np.asarray(center, dtype=np.float32)
+        self.vertices[:, 0:2] += center[:2] - np.asarray(self.center, dtype=np.float32)[:2]
+        self.center = center
+        self.markVerticesDirty()
 
     def instantiateGLObjects(self):
         # Create a vertex array object (vao)
-        self.vao = glGenVertexArrays(1)
-        glBindVertexArray(self.vao)
+        self.createVertexArray()
 
-        # Create a vertex buffer object (vbo)
-        self.vbo = glGenBuffers(1)
-        flat_vertices = self.vertices.flatten()
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        glBufferData(GL_ARRAY_BUFFER, flat_vertices.nbytes, flat_vertices, GL_DYNAMIC_DRAW)
+        # Place the vertices in the shared vertex arena
+        offset = self.allocateVertices(6)
 
         # Tell OpenGL how to interpret the vertex data
-        glEnableVertexAttribArray(0)
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
-        glEnableVertexAttribArray(1)
-        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12))
-
-    def draw(self):
-        # Rebind partial buffer data in case of any updated vertices
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        flat_vertices = self.vertices.flatten()
-        glBufferSubData(GL_ARRAY_BUFFER, 0, flat_vertices.nbytes, flat_vertices)
-        
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset))
+        gl.glEnableVertexAttribArray(1)
+        gl.glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset + 12))
+
+    def render(self):
         # Draw the Circle
-        glBindVertexArray(self.vao)
         if (self.hollow):
-            glDrawArrays(GL_LINE_LOOP, 0, self.CIRCLE_QUALITY)
+            gl.glDrawArrays(GL_LINE_LOOP, 0, self.CIRCLE_QUALITY)
         else:
-            glDrawArrays(GL_TRIANGLE_FAN, 0, self.CIRCLE_QUALITY + 2)
-        glBindVertexArray(0)
+            gl.glDrawArrays(GL_TRIANGLE_FAN, 0, self.CIRCLE_QUALITY + 2)
 
     def updatePosition(self, newPosition=None):
         if (isinstance(newPosition, CirclePosition)):
-            self.center = newPosition.center
-            self.createVertices()
+            self.moveTo(newPosition.center)
         if (self.curr_step < len(self.animation_steps)):
-            self.center = np.array([self.animation_steps[self.curr_step][0], self.animation_steps[self.curr_step][1], 0.0], dtype=np.float32)
+            self.moveTo(np.array([self.animation_steps[self.curr_step][0], self.animation_steps[self.curr_step][1], 0.0], dtype=np.float32))
             self.curr_step += 1
-            self.createVertices()
 
     def animate(self, animateTo, func=None, steps=100):
         self.anim_func = func
@@ -117,6 +112,6 @@ class Circle(VObject):
             self.animation_steps.append([anim_x_values[i], anim_y_values[i], 0.0])
 
     def destroy(self):
-        # Destroy vao and vbo
-        glDeleteVertexArrays(0, (self.vao,))
-        glDeleteBuffers(0, (self.vbo,))
+        # Destroy vao and give the vertices back to the arena
+        gl.glDeleteVertexArrays(1, (self.vao,))
+        self.releaseVertices()
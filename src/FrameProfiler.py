@@ -0,0 +1,88 @@
+import json
+import time
+import numpy as np
+
+class FrameProfiler:
+
+    def __init__(self, capacity=600, phases=("handleInput", "runSimulations", "drawObjects", "animateCamera", "flip")):
+        if (capacity > 0):
+            self.capacity = capacity                                # Frames kept in the ring buffer
+        else:
+            raise Exception("Please input a positive profiler capacity.")
+
+        self.phases = []                                            # Column names, in order of first use
+        self.columns = {}                                           # Phase name -> column index
+        self.samples = np.zeros((capacity, 0), dtype=np.float64)   # Seconds per phase per frame
+        self.current = np.zeros(0, dtype=np.float64)               # The frame being recorded
+        self.started = {}                                           # Phase name -> perf_counter at begin
+        self.frames = 0                                             # Frames recorded in total
+        for phase in phases:
+            self.addPhase(phase)
+
+    def addPhase(self, name):
+        if (name not in self.columns):
+            self.columns[name] = len(self.phases)
+            self.phases.append(name)
+            self.samples = np.pad(self.samples, ((0, 0), (0, 1)))
+            self.current = np.pad(self.current, (0, 1))
+        return self.columns[name]
+
+    def begin(self, name):
+        self.started[name] = time.perf_counter()
+
+    def end(self, name):
+        elapsed = time.perf_counter() - self.started.pop(name)
+        column = self.columns.get(name)
+        if (column is None):
+            column = self.addPhase(name)
+        self.current[column] += elapsed
+
+    def endFrame(self):
+        self.samples[self.frames % self.capacity] = self.current
+        self.current[:] = 0
+        self.frames += 1
+
+    def attachSimulation(self, sim):
+        # Sub-timings for each phase of the simulation's Update, named after the simulation class
+        prefix = type(sim).__name__ + "."
+        sim.addPhaseHook(begin=lambda s, phase: self.begin(prefix + phase),
+                         end=lambda s, phase: self.end(prefix + phase))
+
+    def recentSamples(self):
+        # Recorded frames, oldest first
+        count = min(self.frames, self.capacity)
+        if (self.frames <= self.capacity):
+            return self.samples[:count]
+        start = self.frames % self.capacity
+        return np.concatenate([self.samples[start:], self.samples[:start]])
+
+    def stats(self):
+        # Rolling mean, p95 and p99 per phase over the ring buffer, in milliseconds
+        samples = self.recentSamples() * 1000
+        if (len(samples) == 0):
+            return {}
+
+        stats = {}
+        for name, column in self.columns.items():
+            values = samples[:, column]
+            stats[name] = {
+                "mean": float(np.mean(values)),
+                "p95": float(np.percentile(values, 95)),
+                "p99": float(np.percentile(values, 99)),
+            }
+        return stats
+
+    def summary(self, count=3):
+        # Short text for an on-screen readout: the slowest phases by mean
+        stats = self.stats()
+        slowest = sorted(stats.items(), key=lambda item: item[1]["mean"], reverse=True)[:count]
+        return "  ".join(f"{name} {values['mean']:.2f}/{values['p99']:.2f}ms" for name, values in slowest)
+
+    def exportJSONLines(self, path):
+        # One line per buffered frame with milliseconds per phase
+        samples = self.recentSamples() * 1000
+        first_frame = self.frames - len(samples)
+        with open(path, "w") as f:
+            for index, row in enumerate(samples):
+                phases = {name: float(row[column]) for name, column in self.columns.items()}
+                f.write(json.dumps({"frame": first_frame + index, "phases": phases}) + "\n")
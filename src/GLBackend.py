@@ -0,0 +1,192 @@
+from collections import Counter
+import OpenGL.GL as GL
+from OpenGL.GL.shaders import compileProgram, compileShader
+
+class PyOpenGLBackend:
+    # Forwards every gl* call straight to PyOpenGL
+    headless = False
+
+    def __getattr__(self, name):
+        if (name.startswith("gl")):
+            function = getattr(GL, name)
+            # Cache on the instance so later lookups skip __getattr__
+            setattr(self, name, function)
+            return function
+        raise AttributeError(name)
+
+    def compileProgram(self, *shaders):
+        return compileProgram(*shaders)
+
+    def compileShader(self, source, shader_type):
+        return compileShader(source, shader_type)
+
+    def beginFrame(self):
+        pass
+
+    def endFrame(self):
+        pass
+
+class RecordingGLBackend:
+    # Stands in for OpenGL without a context, counting what the renderer asks for
+    headless = True
+
+    def __init__(self):
+        self.next_id = 1
+        self.bound = {}                             # Currently bound state per bind call and target
+        self.frames = []                            # Per-frame counters, appended by endFrame
+        self.live = {"glGenBuffers": set(), "glGenVertexArrays": set()}     # Generated ids not deleted yet
+        self.reset()
+
+    def reset(self):
+        self.calls = Counter()                      # Calls per function name
+        self.bytes_uploaded = 0                     # Bytes passed to glBufferData and glBufferSubData
+        self.state_changes = 0                      # Binds that changed the bound state
+        self.redundant_binds = 0                    # Binds of what was already bound
+        self.draw_calls = 0
+
+    def __getattr__(self, name):
+        if (not name.startswith("gl")):
+            raise AttributeError(name)
+
+        def record(*args, **kwargs):
+            self.calls[name] += 1
+            return None
+
+        setattr(self, name, record)
+        return record
+
+    def generate(self, name, count):
+        self.calls[name] += 1
+        ids = list(range(self.next_id, self.next_id + count))
+        self.next_id += count
+        if (name in self.live):
+            self.live[name].update(ids)
+        return ids[0] if (count == 1) else ids
+
+    def bind(self, name, target, value, state=None):
+        # state names the binding point when two calls share one, like glEnable and glDisable
+        self.calls[name] += 1
+        key = (state or name, target)
+        if (self.bound.get(key) == value):
+            self.redundant_binds += 1
+        else:
+            self.bound[key] = value
+            self.state_changes += 1
+
+    def glGenBuffers(self, count):
+        return self.generate("glGenBuffers", count)
+
+    def glGenVertexArrays(self, count):
+        return self.generate("glGenVertexArrays", count)
+
+    def delete(self, name, generated, count, ids):
+        # Like GL, only the first count ids are deleted
+        self.calls[name] += 1
+        for id in list(ids)[:count]:
+            self.live[generated].discard(int(id))
+
+    def glDeleteBuffers(self, count, ids):
+        self.delete("glDeleteBuffers", "glGenBuffers", count, ids)
+
+    def glDeleteVertexArrays(self, count, ids):
+        self.delete("glDeleteVertexArrays", "glGenVertexArrays", count, ids)
+
+    def glUseProgram(self, program):
+        self.bind("glUseProgram", None, program)
+
+    def glBindVertexArray(self, vao):
+        self.bind("glBindVertexArray", None, vao)
+
+    def glBindBuffer(self, target, buffer):
+        self.bind("glBindBuffer", target, buffer)
+
+    def glBindBufferBase(self, target, index, buffer):
+        self.bind("glBindBufferBase", (target, index), buffer)
+
+    def glEnable(self, capability):
+        self.bind("glEnable", capability, True)
+
+    def glDisable(self, capability):
+        self.bind("glDisable", capability, False, state="glEnable")
+
+    def glBufferData(self, target, size, data, usage):
+        self.calls["glBufferData"] += 1
+        self.bytes_uploaded += int(size)
+
+    def glBufferSubData(self, target, offset, size, data):
+        self.calls["glBufferSubData"] += 1
+        self.bytes_uploaded += int(size)
+
+    def recordDraw(self, name):
+        self.calls[name] += 1
+        self.draw_calls += 1
+
+    def glDrawArrays(self, *args):
+        self.recordDraw("glDrawArrays")
+
+    def glDrawElements(self, *args):
+        self.recordDraw("glDrawElements")
+
+    def glDrawArraysInstanced(self, *args):
+        self.recordDraw("glDrawArraysInstanced")
+
+    def glDrawElementsInstanced(self, *args):
+        self.recordDraw("glDrawElementsInstanced")
+
+    def glGetUniformLocation(self, program, name):
+        self.calls["glGetUniformLocation"] += 1
+        return 0
+
+    def glGetUniformBlockIndex(self, program, name):
+        self.calls["glGetUniformBlockIndex"] += 1
+        return 0
+
+    def glGetString(self, name):
+        self.calls["glGetString"] += 1
+        return b"recording"
+
+    def glGetError(self):
+        self.calls["glGetError"] += 1
+        return GL.GL_NO_ERROR
+
+    def compileShader(self, source, shader_type):
+        return self.generate("compileShader", 1)
+
+    def compileProgram(self, *shaders):
+        return self.generate("compileProgram", 1)
+
+    def beginFrame(self):
+        self.reset()
+
+    def endFrame(self):
+        self.frames.append(self.report())
+
+    def report(self):
+        return {
+            "calls": dict(self.calls),
+            "total_calls": sum(self.calls.values()),
+            "bytes_uploaded": self.bytes_uploaded,
+            "state_changes": self.state_changes,
+            "redundant_binds": self.redundant_binds,
+            "draw_calls": self.draw_calls,
+            "live_buffers": len(self.live["glGenBuffers"]),
+            "live_vertex_arrays": len(self.live["glGenVertexArrays"]),
+        }
+
+# The backend every renderer module talks to through `gl`
+_backend = PyOpenGLBackend()
+
+class GLProxy:
+    def __getattr__(self, name):
+        return getattr(_backend, name)
+
+gl = GLProxy()
+
+def setBackend(backend):
+    global _backend
+    previous = _backend
+    _backend = backend
+    return previous
+
+def getBackend():
+    return _backend
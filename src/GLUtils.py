@@ -8,6 +8,9 @@ from OpenGL.GLU import *
 from abc import ABC, abstractmethod
 import pyrr
 
+from src.GLBackend import gl
+from src.UniformManager import UniformManager
+
 class GLUtils:
 
     def __init__(self, width, height, camera):
@@ -28,11 +31,12 @@ class GLUtils:
         
         self.aspect_ratio = self.width / self.height
 
-        # Initialize PyGame
-        self.initPyGame(width, height)
+        # Initialize PyGame, unless the GL backend runs without a window
+        if (not gl.headless):
+            self.initPyGame(width, height)
 
         # Create the default vao
-        self.default_vao = glGenVertexArrays(1)
+        self.default_vao = gl.glGenVertexArrays(1)
 
         # Initializing OpenGL
         self.initOpenGL()
@@ -54,23 +58,23 @@ class GLUtils:
         
         pg.display.set_mode((width, height), pg.OPENGL|pg.DOUBLEBUF)
 
-        glEnable(GL_MULTISAMPLE)
-        glEnable(GL_DEPTH_TEST)
-        glEnable(GL_CULL_FACE)
+        gl.glEnable(GL_MULTISAMPLE)
+        gl.glEnable(GL_DEPTH_TEST)
+        gl.glEnable(GL_CULL_FACE)
         # Enable blending for alpha values
-        glEnable(GL_BLEND)
+        gl.glEnable(GL_BLEND)
         # Use alpha as the blend function
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        gl.glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
     def initOpenGL(self):
-        glClearColor(0.3, 0.3, 0.3, 1)
-        glViewport(0, 0, self.width, self.height)
+        gl.glClearColor(0.3, 0.3, 0.3, 1)
+        gl.glViewport(0, 0, self.width, self.height)
         self.__checkGLErrors()
 
     def __checkGLErrors(self):
         # Add this line to print OpenGL version
-        print(f"OpenGL Version: {glGetString(GL_VERSION).decode()}")
-        error = glGetError()
+        print(f"OpenGL Version: {gl.glGetString(GL_VERSION).decode()}")
+        error = gl.glGetError()
         if error != GL_NO_ERROR:
             print(f"OpenGL error: {error}")
         else:
@@ -85,29 +89,48 @@ class GLUtils:
         return lower_bound, upper_bound
 
     def initMatrices(self):
+        # Projection, view and viewPos live in one uniform buffer shared by every program,
+        # rewritten only when the camera or the viewport changed since the last call
+        state = (self.camera.version, self.width, self.height)
+        if (state == self.uniform_state):
+            return
+        self.uniform_state = state
+
         # Set up matrices
         self.initPerspective()
         self.initView()
-        self.initModel()
-        try:
-            # Try to initialize view, if not ok
-            self.initViewPosition()
-        except:
-            pass
-        # Unbind the VAO
-        glBindVertexArray(0)
+        self.initViewPosition()
+        self.uniforms.updateCamera(self.projection_matrix, self.view_matrix, self.viewPos)
+
+    def setViewport(self, width, height):
+        if (width > 0 and height > 0):
+            self.width = width
+            self.height = height
+            self.aspect_ratio = self.width / self.height
+            gl.glViewport(0, 0, self.width, self.height)
+        else:
+            raise Exception("Please input a valid width and height.")
 
     def setTranslucentShader(self):
-        glUseProgram(self.translucent_shader)
+        gl.glUseProgram(self.translucent_shader)
 
     def setDefaultShader(self):
-        glUseProgram(self.shader)
+        gl.glUseProgram(self.shader)
+
+    def setInstancedShader(self):
+        gl.glUseProgram(self.instanced_shader)
 
     def initShaders(self, vertFilePath, fragFilePath):
         # Bind to a default vao
-        glBindVertexArray(self.default_vao)
+        gl.glBindVertexArray(self.default_vao)
         self.shader = self.createShader(vertFilePath, fragFilePath)
         self.translucent_shader = self.createShader("./src/shaders/vert_shaded.txt", "./src/shaders/frag_translucent.txt")
+        self.instanced_shader = self.createShader("./src/shaders/vert_instanced.txt", fragFilePath)
+
+        # Every program reads the camera from the shared uniform buffer and gets the model matrix once
+        self.uniforms = UniformManager()
+        self.uniform_state = None                   # Camera version and viewport the uniform buffer was written for
+        self.initModel()
         self.setDefaultShader()
 
     def createShader(self, vertFilePath, fragFilePath):
@@ -118,9 +141,9 @@ class GLUtils:
             frag_src = f.read()
 
         try:
-            shader = compileProgram(
-                compileShader(vert_src, GL_VERTEX_SHADER),
-                compileShader(frag_src, GL_FRAGMENT_SHADER)
+            shader = gl.compileProgram(
+                gl.compileShader(vert_src, GL_VERTEX_SHADER),
+                gl.compileShader(frag_src, GL_FRAGMENT_SHADER)
             )
             return shader
         except RuntimeError as e:
@@ -142,12 +165,6 @@ class GLUtils:
         # Set up perspective projection
         self.projection_matrix = self.__generatePerspectiveMatrix(45, 0.1, 50.0)
 
-        projection_location = glGetUniformLocation(self.shader, 'projection')
-        if (projection_location >= 0):
-            glUniformMatrix4fv(projection_location, 1, GL_FALSE, self.projection_matrix)
-        else:
-            print("Something went wrong assigning uniform variable: projection.")
-
     def initView(self):
         # Generate view matrix
         self.view_matrix = self.camera.getViewMatrix()
@@ -155,31 +172,20 @@ class GLUtils:
         # Generate bounds
         self.lower_bound, self.upper_bound = self.calculateBounds(self.camera.camera_eye)
 
-        view_location = glGetUniformLocation(self.shader, 'view')
-        if (view_location >= 0):
-            glUniformMatrix4fv(view_location, 1, GL_FALSE, self.view_matrix)
-        else:
-            print("Something went wrong assigning uniform variable: view.")
-
     def initModel(self):
         self.model = np.identity(4, dtype=np.float32)
 
-        model_location = glGetUniformLocation(self.shader, 'model')
-        if (model_location >= 0):
-            glUniformMatrix4fv(model_location, 1, GL_FALSE, self.model)
-        else:
-            print("Something went wrong assigning uniform variable: model.")
-    
+        # The model matrix never changes, so each program gets it once
+        for program in (self.shader, self.translucent_shader, self.instanced_shader):
+            self.uniforms.attachProgram(program)
+            gl.glUseProgram(program)
+            self.uniforms.setMatrix(program, 'model', self.model)
+
     def initViewPosition(self):
         self.viewPos = self.camera.camera_eye
 
-        viewPosition = glGetUniformLocation(self.translucent_shader, 'viewPos')
-        if (viewPosition >= 0):
-            glUniform3fv(viewPosition, 1, self.viewPos)
-        else:
-            print("Something went wrong assigning uniform variable: viewPos.")
-
     def quit(self, objects):
         if (len(objects) > 0):
-            glDeleteProgram(self.shader)
+            gl.glDeleteProgram(self.shader)
+        self.uniforms.destroy()
         pg.quit()
\ No newline at end of file
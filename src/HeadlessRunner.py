@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.Simulation import Simulation
+
+class HeadlessRunner:
+
+    def __init__(self, sim, recorder=None):
+        if (isinstance(sim, Simulation)):
+            self.sim = sim
+        else:
+            raise Exception("Please input a valid Simulation.")
+
+        self.initialized = False
+        # Optional TrajectoryRecorder that receives every step
+        self.recorder = recorder
+
+    def setup(self):
+        # Build the simulation state once, without an app or GL context
+        if (not self.initialized):
+            self.sim.Setup()
+            self.initialized = True
+
+    def stream(self, steps, every=1):
+        # Yield (iteration, state) after every `every` steps, with copies of the state arrays
+        self.setup()
+        for step in range(1, steps + 1):
+            self.sim.Update()
+            if (self.recorder):
+                self.recorder.record(self.sim)
+            if (step % every == 0):
+                state = {name: np.array(value, copy=True) for name, value in self.sim.getState().items()}
+                yield self.sim.iteration, state
+
+    def run(self, steps, every=1):
+        # Run for a number of steps and stack the recorded states into (frames, ...) arrays
+        iterations = []
+        frames = {}
+        for iteration, state in self.stream(steps, every):
+            iterations.append(iteration)
+            for name, value in state.items():
+                frames.setdefault(name, []).append(value)
+
+        result = {name: np.stack(values) for name, values in frames.items()}
+        result["iterations"] = np.array(iterations, dtype=np.int64)
+        return result
@@ -0,0 +1,74 @@
+import numpy as np
+
+# Kernel names accepted for each role, mapped to the SmoothingKernels method that evaluates them
+DENSITY_KERNELS = {"poly6": "poly6", "spiky": "spiky"}
+GRADIENT_KERNELS = {"poly6": "poly6Gradient", "spiky": "spikyGradient"}
+LAPLACIAN_KERNELS = {"viscosity": "viscosityLaplacian"}
+
+class SmoothingKernels:
+
+    def __init__(self, smoothing_distance, dimensions=3, density="spiky", gradient="spiky", laplacian="viscosity"):
+        if (dimensions in (2, 3)):
+            self.dimensions = dimensions
+        else:
+            raise Exception("Please input 2 or 3 dimensions for the smoothing kernels.")
+
+        self.selectKernels(density, gradient, laplacian)
+        self.smoothingDistance = smoothing_distance
+
+    @property
+    def smoothingDistance(self):
+        return self._smoothing_distance
+
+    @smoothingDistance.setter
+    def smoothingDistance(self, smoothing_distance):
+        if (smoothing_distance <= 0):
+            raise Exception("Please input a positive smoothing distance.")
+
+        # Normalization constants only depend on h, so work them out once here
+        h = smoothing_distance
+        self._smoothing_distance = h
+        self._h2 = h * h
+        if (self.dimensions == 3):
+            self._poly6 = 315 / (64 * np.pi * np.pow(h, 9))
+            self._poly6_gradient = -945 / (32 * np.pi * np.pow(h, 9))
+            self._spiky = 15 / (np.pi * np.pow(h, 6))
+            self._spiky_gradient = -45 / (np.pi * np.pow(h, 6))
+            self._viscosity_laplacian = 45 / (np.pi * np.pow(h, 6))
+        else:
+            self._poly6 = 4 / (np.pi * np.pow(h, 8))
+            self._poly6_gradient = -24 / (np.pi * np.pow(h, 8))
+            self._spiky = 10 / (np.pi * np.pow(h, 5))
+            self._spiky_gradient = -30 / (np.pi * np.pow(h, 5))
+            self._viscosity_laplacian = 40 / (np.pi * np.pow(h, 5))
+
+    def selectKernels(self, density="spiky", gradient="spiky", laplacian="viscosity"):
+        if (density not in DENSITY_KERNELS or gradient not in GRADIENT_KERNELS or laplacian not in LAPLACIAN_KERNELS):
+            raise Exception("Please input valid kernel names: density in " + str(list(DENSITY_KERNELS)) +
+                            ", gradient in " + str(list(GRADIENT_KERNELS)) +
+                            ", laplacian in " + str(list(LAPLACIAN_KERNELS)) + ".")
+
+        self.names = {"density": density, "gradient": gradient, "laplacian": laplacian}
+        self.density = getattr(self, DENSITY_KERNELS[density])
+        self.gradient = getattr(self, GRADIENT_KERNELS[gradient])
+        self.laplacian = getattr(self, LAPLACIAN_KERNELS[laplacian])
+
+    # Every kernel takes a scalar or an array of distances and is zero past the smoothing distance
+    def poly6(self, dist):
+        diff = np.maximum(self._h2 - (dist * dist), 0)
+        return self._poly6 * diff * diff * diff
+
+    def poly6Gradient(self, dist):
+        diff = np.maximum(self._h2 - (dist * dist), 0)
+        return self._poly6_gradient * dist * diff * diff
+
+    def spiky(self, dist):
+        diff = np.maximum(self._smoothing_distance - dist, 0)
+        return self._spiky * diff * diff * diff
+
+    def spikyGradient(self, dist):
+        diff = np.maximum(self._smoothing_distance - dist, 0)
+        return self._spiky_gradient * diff * diff
+
+    def viscosityLaplacian(self, dist):
+        return self._viscosity_laplacian * np.maximum(self._smoothing_distance - dist, 0)
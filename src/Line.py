@@ -4,6 +4,7 @@ import ctypes
 from OpenGL.GL.shaders import compileProgram, compileShader
 from OpenGL.GLU import *
 
+from src.GLBackend import gl
 from src.objtypes import LinePosition
 from src.VObject import VObject
 
@@ -52,18 +53,14 @@ class Line(VObject):
 
         # Create a list with the two endpoints
         vertices = [normals_1[0], normals_1[1], normals_2[0], normals_2[1]]
-        self.vertices = np.array(vertices, dtype=np.float32)
+        self.setVertices(np.array(vertices, dtype=np.float32))
         
     def instantiateGLObjects(self):
         # Create a vertex array object (vao)
-        self.vao = glGenVertexArrays(1)
-        glBindVertexArray(self.vao)
+        self.createVertexArray()
 
-        # Create a vertex buffer object (vbo)
-        self.vbo = glGenBuffers(1)
-        flat_vertices = self.vertices.flatten()
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        glBufferData(GL_ARRAY_BUFFER, flat_vertices.nbytes, flat_vertices, GL_DYNAMIC_DRAW)
+        # Place the vertices in the shared vertex arena
+        offset = self.allocateVertices(6)
 
         # Specify indices - draw both sides
         self.indices = np.array([
@@ -74,27 +71,20 @@ class Line(VObject):
         ], dtype=np.uint32)
         
         # Create an element buffer object (ebo)
-        self.ebo = glGenBuffers(1)
-        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
-        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_DYNAMIC_DRAW)
+        self.ebo = gl.glGenBuffers(1)
+        gl.glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        gl.glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_DYNAMIC_DRAW)
+        self.buffer_bytes = self.indices.nbytes
 
         # Tell OpenGL how to interpret the vertex/color data
-        glEnableVertexAttribArray(0)
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
-        glEnableVertexAttribArray(1)
-        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12))
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset))
+        gl.glEnableVertexAttribArray(1)
+        gl.glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset + 12))
     
-    def draw(self):
-        # Bind the vao
-        glBindVertexArray(self.vao)
-        # Rebind partial buffer data in case of any updated vertices
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        flat_vertices = self.vertices.flatten()
-        glBufferSubData(GL_ARRAY_BUFFER, 0, flat_vertices.nbytes, flat_vertices)
-
+    def render(self):
         # Draw the Line
-        glDrawElements(GL_TRIANGLES, 12, GL_UNSIGNED_INT, None)
-        glBindVertexArray(0)
+        gl.glDrawElements(GL_TRIANGLES, 12, GL_UNSIGNED_INT, None)
 
     def updatePosition(self, newPosition=None):
         return super().updatePosition(newPosition)
@@ -106,5 +96,7 @@ class Line(VObject):
         return super().createAnimationPositions()
 
     def destroy(self):
-        # Destroy vao and vbo
-        glDeleteBuffers(0, (self.vbo,))
+        # Destroy vao and ebo, and give the vertices back to the arena
+        gl.glDeleteVertexArrays(1, (self.vao,))
+        gl.glDeleteBuffers(1, (self.ebo,))
+        self.releaseVertices()
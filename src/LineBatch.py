@@ -0,0 +1,103 @@
+from OpenGL.GL import *
+import numpy as np
+import ctypes
+
+from src.GLBackend import gl
+from src.VObject import VObject
+
+class LineBatch(VObject):
+
+    def __init__(self, z_index = 0):
+        super().__init__()
+        self.starts = []                            # Segment start points, one (n, 3) array per add
+        self.ends = []                              # Segment end points
+        self.colors = []                            # Segment colors
+        self.thicknesses = []                       # Segment thicknesses, already scaled like Line's
+        self.segment_count = 0
+        self.z_index = z_index
+
+    def addSegment(self, start, end, color = (1.0, 1.0, 1.0), thickness = 1.0):
+        self.addSegments([start], [end], colors=[color], thickness=thickness)
+
+    def addSegments(self, starts, ends, colors = (1.0, 1.0, 1.0), thickness = 1.0):
+        if (self.vertex_range is not None):
+            raise Exception("Please add every segment before adding the batch to the App.")
+
+        starts = np.asarray(starts, dtype=np.float32).reshape(-1, 3)
+        ends = np.asarray(ends, dtype=np.float32).reshape(-1, 3)
+        if (len(starts) != len(ends)):
+            raise Exception("Please input the same number of start and end points.")
+
+        count = len(starts)
+        self.starts.append(starts)
+        self.ends.append(ends)
+        self.colors.append(np.broadcast_to(np.asarray(colors, dtype=np.float32), (count, 3)))
+        # Thickness works like Line's, a hundredth of the given value
+        self.thicknesses.append(np.broadcast_to(np.asarray(thickness, dtype=np.float32) / 100, (count,)))
+        self.segment_count += count
+
+    def createVertices(self):
+        starts = np.concatenate(self.starts) if self.starts else np.zeros((0, 3), dtype=np.float32)
+        ends = np.concatenate(self.ends) if self.ends else np.zeros((0, 3), dtype=np.float32)
+        colors = np.concatenate(self.colors) if self.colors else np.zeros((0, 3), dtype=np.float32)
+        thicknesses = np.concatenate(self.thicknesses) if self.thicknesses else np.zeros(0, dtype=np.float32)
+
+        # The same perpendicular offset Line uses, for every segment at once
+        direction = ends - starts
+        length = np.linalg.norm(direction, axis=1, keepdims=True)
+        direction = np.divide(direction, length, out=np.zeros_like(direction), where=(length > 0))
+        dx, dy, dz = direction[:, 0], direction[:, 1], direction[:, 2]
+        offset = np.stack([(-dy + dz), dx, dz], axis=1) * (thicknesses / 2.0)[:, None]
+
+        # Four corners per segment: start + offset, start - offset, end + offset, end - offset
+        vertices = np.empty((self.segment_count, 4, 6), dtype=np.float32)
+        vertices[:, 0, 0:3] = starts + offset
+        vertices[:, 1, 0:3] = starts - offset
+        vertices[:, 2, 0:3] = ends + offset
+        vertices[:, 3, 0:3] = ends - offset
+        vertices[:, :, 3:6] = colors[:, None, :]
+        self.setVertices(vertices.reshape(-1, 6))
+
+        # Both sides of both triangles of each segment, like Line
+        pattern = np.array([0, 1, 2, 2, 1, 0, 2, 1, 3, 3, 1, 2], dtype=np.uint32)
+        self.indices = (pattern[None, :] + (np.arange(self.segment_count, dtype=np.uint32) * 4)[:, None]).ravel()
+
+    def instantiateGLObjects(self):
+        # Create a vertex array object (vao)
+        self.createVertexArray()
+
+        # Place the vertices in the shared vertex arena
+        offset = self.allocateVertices(6)
+
+        # Create an element buffer object (ebo) for every segment
+        self.ebo = gl.glGenBuffers(1)
+        gl.glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        gl.glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+        self.buffer_bytes = self.indices.nbytes
+
+        # Tell OpenGL how to interpret the vertex/color data
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset))
+        gl.glEnableVertexAttribArray(1)
+        gl.glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset + 12))
+        gl.glBindVertexArray(0)
+
+    def render(self):
+        # Draw every segment in one call
+        if (self.segment_count > 0):
+            gl.glDrawElements(GL_TRIANGLES, len(self.indices), GL_UNSIGNED_INT, None)
+
+    def updatePosition(self, newPosition=None):
+        pass
+
+    def animate(self, animateTo, func=None, steps=100):
+        raise Exception("Please animate individual Line objects instead of a batch.")
+
+    def createAnimationPositions(self, steps):
+        pass
+
+    def destroy(self):
+        # Destroy vao and ebo, and give the vertices back to the arena
+        gl.glDeleteVertexArrays(1, (self.vao,))
+        gl.glDeleteBuffers(1, (self.ebo,))
+        self.releaseVertices()
@@ -0,0 +1,82 @@
+import numpy as np
+
+from src.SpatialGrid import SpatialGrid
+
+class NeighborList:
+
+    def __init__(self, width, height, radius, skin=0.0):
+        if (radius > 0 and skin >= 0):
+            self.radius = radius                                    # Interaction radius
+            self.skin = skin                                        # Extra margin so the list survives several steps
+        else:
+            raise Exception("Please input a positive radius and a non-negative skin.")
+
+        self.width = width
+        self.height = height
+        # Cells at least radius + skin wide so the 3x3 neighborhood covers the search radius
+        self.cell_size = radius + skin
+        cols = max(int(np.floor(2 * width / self.cell_size)), 1)
+        rows = max(int(np.floor(2 * height / self.cell_size)), 1)
+        self.cell_width = 2 * width / cols
+        self.cell_height = 2 * height / rows
+        self.grid = SpatialGrid(cols, rows)
+
+        # CSR layout: the neighbors of particle i are indices[offsets[i]:offsets[i + 1]]
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int64)
+        self.owners = np.zeros(0, dtype=np.int64)                  # Particle each entry of indices belongs to
+        self.reference_positions = None                             # Positions at the last build
+        self.builds = 0
+
+    def calculateKeys(self, positions):
+        col = np.floor((positions[:, 0] + self.width) / self.cell_width).astype(np.int64)
+        row = self.grid.rows - np.floor((positions[:, 1] + self.height) / self.cell_height).astype(np.int64) - 1
+        col = np.clip(col, 0, self.grid.cols - 1)
+        row = np.clip(row, 0, self.grid.rows - 1)
+        return col + (self.grid.cols * row)
+
+    def needsRebuild(self, positions):
+        if (self.reference_positions is None or len(self.reference_positions) != len(positions)):
+            return True
+
+        # The list stays valid until some particle has moved more than half the skin
+        displacement = positions - self.reference_positions
+        max_displacement = np.sqrt(np.max(np.sum(displacement * displacement, axis=1), initial=0))
+        return max_displacement > self.skin / 2
+
+    def update(self, positions):
+        if (self.needsRebuild(positions)):
+            self.build(positions)
+
+    def build(self, positions):
+        count = len(positions)
+        search_radius = self.radius + self.skin
+        self.grid.rebuild(self.calculateKeys(positions))
+
+        owners = []
+        neighbors = []
+        for cell_index in self.grid.occupiedCells():
+            samples = self.grid.cellParticles(cell_index)
+            candidates = self.grid.neighbors(cell_index)
+
+            offsets = positions[candidates][np.newaxis, :, :] - positions[samples][:, np.newaxis, :]
+            within = np.sum(offsets * offsets, axis=2) <= search_radius * search_radius
+            sample_rows, candidate_cols = np.nonzero(within)
+            owners.append(samples[sample_rows])
+            neighbors.append(candidates[candidate_cols])
+
+        owners = np.concatenate(owners) if owners else np.zeros(0, dtype=np.int64)
+        neighbors = np.concatenate(neighbors) if neighbors else np.zeros(0, dtype=np.int64)
+
+        # Group the pairs by owning particle; every particle also lists itself
+        order = np.argsort(owners, kind='stable')
+        self.owners = owners[order]
+        self.indices = neighbors[order]
+        self.offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.owners, minlength=count), out=self.offsets[1:])
+
+        self.reference_positions = positions.copy()
+        self.builds += 1
+
+    def neighborsOf(self, index):
+        return self.indices[self.offsets[index]:self.offsets[index + 1]]
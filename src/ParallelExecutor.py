@@ -0,0 +1,187 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+from src.Kernels import SmoothingKernels
+from src.SpatialGrid import SpatialGrid
+
+# Shared memory blocks a worker process has attached to, by role
+_attached = {}
+
+def _attach(specs):
+    arrays = {}
+    for role, (shm_name, shape, dtype) in specs.items():
+        block = _attached.get(role)
+        if (block is None or block.name != shm_name):
+            if (block is not None):
+                block.close()
+            block = shared_memory.SharedMemory(name=shm_name)
+            _attached[role] = block
+        arrays[role] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return arrays
+
+def _gridFromArrays(arrays, cols, rows):
+    grid = SpatialGrid(cols, rows)
+    grid.order = arrays["order"]
+    grid.starts = arrays["starts"]
+    grid.counts = arrays["counts"]
+    return grid
+
+def _kernelsFromParams(params):
+    kernels = params["kernels"]
+    return SmoothingKernels(params["smoothing_distance"], params["dimensions"], 
+                            kernels["density"], kernels["gradient"], kernels["laplacian"])
+
+def bandDensities(arrays, grid, params, first_row, last_row):
+    # Density of every particle whose cell lies in rows [first_row, last_row), reading the one-row halo on each side
+    kernels = _kernelsFromParams(params)
+    positions = arrays["positions"]
+    masses = arrays["masses"]
+    out = arrays["out"]
+
+    for cell_index in range(first_row * grid.cols, last_row * grid.cols):
+        if (grid.counts[cell_index] == 0): continue
+
+        samples = grid.cellParticles(cell_index)
+        neighbors = grid.neighbors(cell_index)
+        offsets = positions[neighbors][np.newaxis, :, :] - positions[samples][:, np.newaxis, :]
+        dists = np.sqrt(np.sum(offsets * offsets, axis=2))
+        influence = kernels.density(dists)
+        out[samples] = influence @ masses[neighbors]
+
+def sharedPressure(density1, density2, params):
+    pressure1 = params["stiffness"] * (density1 - params["target_density"])
+    pressure2 = params["stiffness"] * (density2 - params["target_density"])
+    return (pressure1 + pressure2) / 2
+
+def pairForces(arrays, owners, neighbors, params, first, last):
+    # Net pressure and viscosity force on particles [first, last) from their (owner, neighbor) pairs,
+    # plus mu times the summed viscosity weights in a fourth column for the adaptive timestep.
+    # The serial path calls this on the whole neighbor list and every band on its own slice of it,
+    # so each particle sums the same pairs in the same order either way
+    kernels = _kernelsFromParams(params)
+    h = params["smoothing_distance"]
+    positions = arrays["positions"]
+    velocities = arrays["velocities"]
+    masses = arrays["masses"]
+    densities = arrays["densities"]
+
+    offset = positions[neighbors] - positions[owners]
+    dist = np.sqrt(np.sum(offset * offset, axis=1))
+
+    # Skip self pairs, pairs only inside the skin and neighbors with no density
+    density = densities[neighbors]
+    valid = (owners != neighbors) & (dist < h) & (density != 0)
+    owners = owners[valid]
+    neighbors = neighbors[valid]
+    offset = offset[valid]
+    dist = dist[valid]
+    density = density[valid]
+    dir = np.divide(offset, dist[:, np.newaxis], out=np.zeros_like(offset), where=(dist[:, np.newaxis] != 0))
+
+    # Viscosity forces
+    v_slope = kernels.laplacian(dist)
+    v_weight = masses[neighbors] * v_slope / density
+    viscosity = v_weight[:, np.newaxis] * (velocities[neighbors] - velocities[owners])
+
+    # Pressure forces
+    slope = kernels.gradient(dist)
+    pressure = (sharedPressure(density, densities[owners], params) * masses[owners] * slope / density)[:, np.newaxis] * dir
+
+    # Sum the pair contributions onto each particle
+    pair_forces = (params["mu"] * viscosity) + pressure
+    net_forces = np.zeros((last - first, 4), dtype=np.float32)
+    for axis in range(3):
+        net_forces[:, axis] = np.bincount(owners - first, weights=pair_forces[:, axis], minlength=last - first)
+    net_forces[:, 3] = params["mu"] * np.bincount(owners - first, weights=v_weight, minlength=last - first)
+    return net_forces
+
+def bandForces(arrays, grid, params, first, last):
+    # Net force on particles [first, last), from their entries in the shared neighbor list
+    pairs = slice(arrays["offsets"][first], arrays["offsets"][last])
+    arrays["out"][first:last] = pairForces(arrays, arrays["owners"][pairs], arrays["indices"][pairs], params, first, last)
+
+# Density bands are ranges of grid rows, force bands are ranges of particles in the neighbor list
+BAND_PHASES = {
+    "density": bandDensities,
+    "forces": bandForces,
+}
+
+def _evaluateBand(phase, specs, cols, rows, params, first, last):
+    arrays = _attach(specs)
+    grid = _gridFromArrays(arrays, cols, rows) if ("order" in arrays) else None
+    BAND_PHASES[phase](arrays, grid, params, first, last)
+
+class ParallelExecutor:
+
+    def __init__(self, workers, bands=None):
+        if (workers >= 1):
+            self.workers = workers
+        else:
+            raise Exception("Please input at least one worker.")
+
+        self.bands = bands if bands else workers                   # Number of row bands the grid is split into
+        self.pool = ProcessPoolExecutor(max_workers=workers) if (workers > 1) else None
+        self.blocks = {}                                            # Shared memory block for each role
+
+    def share(self, role, array):
+        # Copy an array into its shared memory block, replacing the block if the shape changed
+        array = np.ascontiguousarray(array)
+        block, view = self.blocks.get(role, (None, None))
+        if (view is None or view.shape != array.shape or view.dtype != array.dtype):
+            if (block is not None):
+                block.close()
+                block.unlink()
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            self.blocks[role] = (block, view)
+        view[...] = array
+        return view
+
+    def splitRows(self, rows):
+        bands = min(self.bands, rows)
+        edges = np.linspace(0, rows, bands + 1).round().astype(int)
+        return [(int(edges[i]), int(edges[i + 1])) for i in range(bands)]
+
+    def evaluate(self, phase, grid, arrays, params, out_shape):
+        # Every band writes only its own particles, so the bands can run in any order
+        self.share("order", grid.order)
+        self.share("starts", grid.starts)
+        self.share("counts", grid.counts)
+        return self.run(phase, ["order", "starts", "counts"], arrays, params, out_shape, self.splitRows(grid.rows), grid.cols, grid.rows)
+
+    def evaluatePairs(self, phase, neighbors, arrays, params, out_shape):
+        # Like evaluate, but split the particles of a NeighborList into bands instead of the grid rows
+        self.share("offsets", neighbors.offsets)
+        self.share("owners", neighbors.owners)
+        self.share("indices", neighbors.indices)
+        return self.run(phase, ["offsets", "owners", "indices"], arrays, params, out_shape, self.splitRows(out_shape[0]), None, None)
+
+    def run(self, phase, structure, arrays, params, out_shape, bands, cols, rows):
+        for role, array in arrays.items():
+            self.share(role, array)
+        self.share("out", np.zeros(out_shape, dtype=np.float32))
+
+        roles = [*structure, "out", *arrays.keys()]
+        if (self.pool):
+            specs = {role: (self.blocks[role][0].name, self.blocks[role][1].shape, self.blocks[role][1].dtype.str) for role in roles}
+            futures = [self.pool.submit(_evaluateBand, phase, specs, cols, rows, params, first, last)
+                       for first, last in bands]
+            for future in futures:
+                future.result()
+        else:
+            views = {role: self.blocks[role][1] for role in roles}
+            shared_grid = _gridFromArrays(views, cols, rows) if ("order" in views) else None
+            for first, last in bands:
+                BAND_PHASES[phase](views, shared_grid, params, first, last)
+
+        return self.blocks["out"][1].copy()
+
+    def close(self):
+        if (self.pool):
+            self.pool.shutdown()
+            self.pool = None
+        for block, _ in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
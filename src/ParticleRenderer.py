@@ -0,0 +1,114 @@
+from OpenGL.GL import *
+import numpy as np
+import ctypes
+
+from src.GLBackend import gl
+from src.VObject import VObject
+
+class ParticleRenderer(VObject):
+    primitive = GL_TRIANGLE_FAN
+
+    def __init__(self, centers, radius=0.04, color=(1.0, 0.0, 0.0), quality=25, z_index=0):
+        super().__init__()
+
+        self.quality = quality                      # How many points the disc outline has
+        self.z_index = z_index
+        self.count = 0                              # Particles drawn
+        self.capacity = 0                           # Particles the instance buffer has room for
+        self.instances = np.zeros((0, 7), dtype=np.float32)     # center xyz, color rgb, radius per particle
+        self.dirty = True                           # Instance data changed since the last upload
+        self.updateInstances(centers, colors=color, radii=radius)
+
+    def createVertices(self):
+        # One unit disc shared by every particle, as a triangle fan around the origin
+        angles = np.arange(self.quality + 1) / self.quality * (2 * np.pi)
+        self.vertices = np.zeros((self.quality + 2, 3), dtype=np.float32)
+        self.vertices[1:, 0] = np.cos(angles)
+        self.vertices[1:, 1] = np.sin(angles)
+        self.vertex_count = len(self.vertices)
+
+    def instantiateGLObjects(self):
+        # Create a vertex array object (vao)
+        self.createVertexArray()
+
+        # The disc mesh, uploaded once
+        self.vbo = gl.glGenBuffers(1)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        gl.glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+        self.buffer_bytes = self.vertices.nbytes
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(0))
+
+        # The per particle data, advanced once per instance instead of once per vertex
+        self.instance_vbo = gl.glGenBuffers(1)
+        self.allocateInstances()
+        gl.glEnableVertexAttribArray(1)
+        gl.glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 28, ctypes.c_void_p(0))
+        gl.glVertexAttribDivisor(1, 1)
+        gl.glEnableVertexAttribArray(2)
+        gl.glVertexAttribPointer(2, 3, GL_FLOAT, GL_FALSE, 28, ctypes.c_void_p(12))
+        gl.glVertexAttribDivisor(2, 1)
+        gl.glEnableVertexAttribArray(3)
+        gl.glVertexAttribPointer(3, 1, GL_FLOAT, GL_FALSE, 28, ctypes.c_void_p(24))
+        gl.glVertexAttribDivisor(3, 1)
+        gl.glBindVertexArray(0)
+
+    def allocateInstances(self):
+        # Size the buffer for the current particles, then later frames only overwrite it
+        self.capacity = max(self.count, 1)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        gl.glBufferData(GL_ARRAY_BUFFER, self.capacity * 28, None, GL_DYNAMIC_DRAW)
+        self.buffer_bytes = self.vertices.nbytes + (self.capacity * 28)
+        self.dirty = True
+
+    def updateInstances(self, centers, colors=None, radii=None):
+        centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+        if (len(centers) != self.count):
+            # Keep the colors and radii of particles that already existed
+            instances = np.zeros((len(centers), 7), dtype=np.float32)
+            kept = min(len(centers), self.count)
+            instances[:kept] = self.instances[:kept]
+            if (self.count > 0 and len(centers) > kept):
+                instances[kept:, 3:] = self.instances[self.count - 1, 3:]
+            self.instances = instances
+            self.count = len(centers)
+            if (self.capacity > 0 and self.count > self.capacity):
+                gl.glBindVertexArray(self.vao)
+                self.allocateInstances()
+                gl.glBindVertexArray(0)
+
+        self.instances[:, 0:3] = centers
+        if (colors is not None):
+            self.instances[:, 3:6] = colors
+        if (radii is not None):
+            self.instances[:, 6] = radii
+        self.dirty = True
+
+    def render(self):
+        if (self.count == 0):
+            return
+
+        # Every particle in one upload, only when something moved
+        if (self.dirty):
+            gl.glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+            gl.glBufferSubData(GL_ARRAY_BUFFER, 0, self.instances.nbytes, self.instances)
+            self.dirty = False
+
+        # Draw every particle in one call
+        gl.glDrawArraysInstanced(GL_TRIANGLE_FAN, 0, self.vertex_count, self.count)
+
+    def updatePosition(self, newPosition=None):
+        # Centers come from updateInstances, once per frame for all particles
+        if (newPosition is not None):
+            self.updateInstances(newPosition)
+
+    def animate(self, animateTo, func=None, steps=100):
+        raise Exception("Please animate particles through the simulation.")
+
+    def createAnimationPositions(self, steps):
+        pass
+
+    def destroy(self):
+        # Destroy vao and vbos
+        gl.glDeleteVertexArrays(1, (self.vao,))
+        gl.glDeleteBuffers(2, (self.vbo, self.instance_vbo))
@@ -0,0 +1,85 @@
+from typing import List
+import numpy as np
+
+from src.Circle import Circle
+from src.Line import Line
+from src.ParticleRenderer import ParticleRenderer
+from src.Tile import Tile
+from src.objtypes import CirclePosition, PositionTypes as pt
+from src.utils import MathUtils as mt
+
+class ParticleVisualizer:
+
+    def __init__(self, app, width, height, cell_size=None, show_particles=True, show_background=False, radius=0.4, instanced=True):
+        self.app = app
+        self.width = width                          # Half width of the box
+        self.height = height                        # Half height of the box
+        self.cell_size = cell_size                  # Size of the background cells
+        self.show_particles = show_particles
+        self.show_background = show_background
+        self.radius = radius
+        self.instanced = instanced                  # Draw every particle with one instanced call instead of a circle each
+        self.renderer = None                        # The instanced particle renderer
+        self.points: List[Circle] = []              # One circle per particle
+        self.cells: List[Tile] = []                 # Visual cells
+        self.cell_counts = None                     # Particle count per cell at the last update
+
+    def build(self, positions):
+        if (self.show_background and self.cell_size):
+            self.drawBackground()
+
+        if (self.show_particles and self.instanced):
+            # Same size as the circles, which scale their radius down by ten
+            self.renderer = ParticleRenderer(positions, radius=self.radius / 10, z_index=50)
+            self.app.addObject(self.renderer)
+        elif (self.show_particles):
+            for position in positions:
+                point = Circle(radius=self.radius, center=np.array(position, dtype=np.float32), z_index=50)
+                self.points.append(point)
+            self.app.addObjects(self.points)
+
+        self.drawBorder()
+
+    def drawBorder(self):
+        particle_radius = 0.08
+        bottom_left = pt.createArray(-self.width - particle_radius, -self.height - particle_radius, 0)
+        bottom_right = pt.createArray(self.width + particle_radius, -self.height - particle_radius, 0)
+        top_right = pt.createArray(self.width + particle_radius, self.height + particle_radius, 0)
+        top_left = pt.createArray(-self.width - particle_radius, self.height + particle_radius, 0)
+
+        border_top = Line(top_left, top_right)
+        border_right = Line(top_right, bottom_right)
+        border_bottom = Line(bottom_right, bottom_left)
+        border_left = Line(bottom_left, top_left)
+
+        self.app.addObjects([border_top, border_right, border_bottom, border_left])
+
+    def drawBackground(self):
+        # Tiles are created row by row from the top left, matching the grid's cell keys
+        cols = np.linspace(-self.width, self.width, round(self.width * 2 / self.cell_size), endpoint=False)
+        rows = np.linspace(self.height, -self.height, round(self.height * 2 / self.cell_size), endpoint=False)
+        for row in rows:
+            for col in cols:
+                cell = Tile(np.array([pt.createArray(col, row, 0),
+                                    pt.createArray(col + self.cell_size, row, 0),
+                                    pt.createArray(col, row - self.cell_size, 0),
+                                    pt.createArray(col + self.cell_size, row - self.cell_size, 0)], dtype=np.float32),
+                            color=mt.createColor(0, 0, 0),
+                            z_index=0)
+                self.cells.append(cell)
+        self.app.addObjects(self.cells)
+
+    def update(self, positions, cell_counts=None):
+        if (self.show_background and cell_counts is not None and len(self.cells) > 0):
+            old_counts = self.cell_counts if (self.cell_counts is not None) else np.zeros_like(cell_counts)
+            for cell_index in np.flatnonzero(old_counts != cell_counts):
+                newColor = mt.createColor(0, 0, np.min([cell_counts[cell_index] * 35, 255]))
+                self.cells[cell_index].updateColor(newColor)
+            self.cell_counts = cell_counts.copy()
+
+        if (self.renderer):
+            self.renderer.updateInstances(positions)
+        elif (self.show_particles):
+            for index, point in enumerate(self.points):
+                newPosition = CirclePosition(center=np.array(positions[index], dtype=np.float32))
+                point.updatePosition(newPosition)
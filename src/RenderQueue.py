@@ -0,0 +1,47 @@
+from src.GLBackend import gl
+
+class RenderQueue:
+
+    def __init__(self):
+        self.items = []                             # (program, object) in the order they are drawn
+        self.program_binds = 0                      # glUseProgram calls issued by the last draw
+        self.vao_binds = 0                          # glBindVertexArray calls issued by the last draw
+        self.stale = False                          # Set when the scene changes, so the next draw rebuilds first
+
+    def build(self, layers, translucent, programFor):
+        # Layers are drawn in the order given. Inside a layer, objects are grouped by program,
+        # then primitive, then vao. Translucent objects come last and only group by program,
+        # since their blending depends on the order they were added in
+        self.items = []
+        for layer in layers:
+            entries = [(programFor(obj), obj) for obj in layer]
+            entries.sort(key=lambda entry: (entry[0] or 0, entry[1].primitive, entry[1].vao or 0))
+            self.items.extend(entries)
+
+        entries = [(programFor(obj), obj) for obj in translucent]
+        entries.sort(key=lambda entry: entry[0] or 0)
+        self.items.extend(entries)
+        self.stale = False
+
+    def invalidate(self):
+        self.stale = True
+
+    def draw(self):
+        # Only bind a program or vao when it differs from the one already bound
+        program = None
+        vao = None
+        self.program_binds = 0
+        self.vao_binds = 0
+        for item_program, obj in self.items:
+            if (item_program != program):
+                gl.glUseProgram(item_program)
+                program = item_program
+                self.program_binds += 1
+            if (obj.vao != vao):
+                gl.glBindVertexArray(obj.vao)
+                vao = obj.vao
+                self.vao_binds += 1
+            obj.render()
+
+        if (vao is not None):
+            gl.glBindVertexArray(0)
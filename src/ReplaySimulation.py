@@ -0,0 +1,65 @@
+import numpy as np
+
+from src.ParticleVisualizer import ParticleVisualizer
+from src.Simulation import Simulation
+from src.TrajectoryRecorder import TrajectoryReader
+
+class ReplaySimulation(Simulation):
+
+    def __init__(self, path, speed=1.0, loop=True, show_particles=True):
+        super().__init__()
+        self.path = path
+        self.reader = None
+        self.speed = speed                          # Frames advanced per step, negative to play backwards
+        self.loop = loop                            # Wrap around at either end instead of stopping
+        self.show_particles = show_particles
+        self.position = 0.0                         # Fractional frame index being shown
+
+    def Setup(self):
+        # Only the file is mapped; frames are paged in as they are shown
+        self.reader = TrajectoryReader(self.path)
+
+    def Render(self):
+        self.Setup()
+
+        if (self.app and not self.visualizer):
+            metadata = self.reader.metadata
+            self.attachVisualizer(ParticleVisualizer(self.app, metadata.get("width", 1.0), metadata.get("height", 1.0),
+                                                     cell_size=metadata.get("cell_size"),
+                                                     show_particles=self.show_particles))
+        if (self.visualizer and len(self.reader) > 0):
+            self.visualizer.build(self.reader.frame(0)["positions"])
+
+    def seek(self, frame):
+        last = len(self.reader) - 1
+        if (last < 0):
+            self.position = 0.0
+        elif (self.loop):
+            self.position = float(frame) % (last + 1)
+        else:
+            self.position = float(np.clip(frame, 0, last))
+
+    def Update(self):
+        self.seek(self.position + self.speed)
+        self.iteration += 1
+
+    def currentFrames(self):
+        # The two frames around the current position and how far between them it is
+        first = int(np.floor(self.position))
+        second = first + 1
+        if (second >= len(self.reader)):
+            second = 0 if self.loop else first
+        return self.reader.frame(first), self.reader.frame(second), self.position - first
+
+    def getState(self):
+        if (len(self.reader) == 0):
+            return {}
+        frame, _, _ = self.currentFrames()
+        return {"positions": frame["positions"], "velocities": frame["velocities"], "densities": frame["densities"]}
+
+    def Interpolate(self, alpha):
+        # The replay position is already fractional, so frames are blended by it rather than alpha
+        if (self.visualizer and len(self.reader) > 0):
+            first, second, fraction = self.currentFrames()
+            positions = first["positions"] + ((second["positions"] - first["positions"]) * fraction)
+            self.visualizer.update(positions)
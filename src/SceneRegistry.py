@@ -0,0 +1,55 @@
+class SceneRegistry:
+
+    def __init__(self):
+        self.next_handle = 1
+        self.entries = {}                           # Handle -> object, for every object in the scene
+        self.layers = {}                            # z index -> {handle: object}, in the order they were added
+        self.translucent = {}                       # Handle -> object drawn after the rest with the translucent shader
+
+    def add(self, obj, translucent=False):
+        handle = self.next_handle
+        self.next_handle += 1
+        obj.handle = handle
+        self.entries[handle] = obj
+        if (translucent):
+            self.translucent[handle] = obj
+        else:
+            self.layers.setdefault(obj.z_index, {})[handle] = obj
+        return handle
+
+    def remove(self, handle):
+        obj = self.entries.pop(handle, None)
+        if (obj is None):
+            raise Exception("Please input a handle of an object in the scene.")
+
+        if (handle in self.translucent):
+            del self.translucent[handle]
+        else:
+            layer = self.layers[obj.z_index]
+            del layer[handle]
+            if (len(layer) == 0):
+                del self.layers[obj.z_index]
+        obj.handle = None
+        return obj
+
+    def get(self, handle):
+        return self.entries[handle]
+
+    def orderedLayers(self):
+        # Highest z index first; only the layer keys are sorted, not the objects
+        return [list(self.layers[z_index].values()) for z_index in sorted(self.layers, reverse=True)]
+
+    def ordered(self):
+        return [obj for layer in self.orderedLayers() for obj in layer]
+
+    def translucentObjects(self):
+        return list(self.translucent.values())
+
+    def __contains__(self, handle):
+        return handle in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries.values())
@@ -1,12 +1,63 @@
 class Simulation:
     def __init__(self):
         self.iteration = 0
+        # Simulated time in seconds
+        self.time = 0.0
+        # Fixed length of one step, in seconds of simulated time
+        self.deltaTime = 1 / 60
+        # Wall time the app owes this simulation, consumed in deltaTime substeps
+        self.accumulator = 0.0
+        self.app = None
+        # Optional object that draws the simulation state, so the physics can run without a window
+        self.visualizer = None
+        # Ordered (name, function) pairs run by runPhases
+        self.phases = []
+        # (phase, begin, end) hooks called around each phase
+        self.phase_hooks = []
 
     def addApp(self, app):
         self.app = app
 
-    def Render(self):
+    def attachVisualizer(self, visualizer):
+        self.visualizer = visualizer
+
+    def addPhaseHook(self, begin=None, end=None, phase=None):
+        # Hooks are called as hook(sim, phase_name); a phase of None means every phase
+        self.phase_hooks.append((phase, begin, end))
+
+    def removePhaseHook(self, begin=None, end=None, phase=None):
+        self.phase_hooks.remove((phase, begin, end))
+
+    def runPhase(self, name, func):
+        for phase, begin, _ in self.phase_hooks:
+            if (begin and (phase is None or phase == name)):
+                begin(self, name)
+        func()
+        for phase, _, end in self.phase_hooks:
+            if (end and (phase is None or phase == name)):
+                end(self, name)
+
+    def runPhases(self):
+        for name, func in self.phases:
+            self.runPhase(name, func)
+
+    def getState(self):
+        # Named arrays describing the current state, used by headless runs
+        return {}
+
+    def close(self):
         pass
 
+    def Setup(self):
+        # Build the initial state without touching the app
+        pass
+
+    def Render(self):
+        self.Setup()
+
     def Update(self):
         pass
+
+    def Interpolate(self, alpha):
+        # Draw the state alpha of the way from the previous step to the current one
+        pass
@@ -0,0 +1,56 @@
+import numpy as np
+
+class SpatialGrid:
+
+    def __init__(self, cols, rows):
+        if (cols > 0 and rows > 0):
+            self.cols = cols                                        # Number of cells along x
+            self.rows = rows                                        # Number of cells along y
+        else:
+            raise Exception("Please input a valid number of rows and columns for the grid.")
+
+        self.cell_count = cols * rows
+        self.keys = np.zeros(0, dtype=np.int64)                    # Cell key of every particle
+        self.order = np.zeros(0, dtype=np.int64)                   # Particle indices sorted by cell key
+        self.counts = np.zeros(self.cell_count, dtype=np.int64)    # Particles per cell
+        self.starts = np.zeros(self.cell_count, dtype=np.int64)    # Offset of each cell into order
+
+    def rebuild(self, keys):
+        # Counting sort of the particle indices on their cell key
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.counts = np.bincount(self.keys, minlength=self.cell_count)
+        self.starts = np.cumsum(self.counts) - self.counts
+        self.order = self.sortedOrder(self.keys)
+
+    def sortedOrder(self, keys):
+        # NumPy sorts 16-bit integers with a stable radix sort, so the keys are sorted 16 bits at a time
+        # (least significant first), keeping the whole sort O(N) instead of a comparison sort
+        order = np.argsort(keys.astype(np.uint16), kind='stable')
+        if (self.cell_count > (1 << 16)):
+            high = (keys >> 16).astype(np.uint16)
+            order = order[np.argsort(high[order], kind='stable')]
+        return order
+
+    def cellParticles(self, cell_index):
+        start = self.starts[cell_index]
+        return self.order[start:start + self.counts[cell_index]]
+
+    def occupiedCells(self):
+        return np.flatnonzero(self.counts)
+
+    def neighborRows(self, cell_index):
+        # The 3x3 neighborhood is three runs of adjacent keys, so each row is one contiguous slice of order
+        row, col = divmod(int(cell_index), self.cols)
+        first_col = max(col - 1, 0)
+        last_col = min(col + 1, self.cols - 1)
+
+        slices = []
+        for neighbor_row in range(max(row - 1, 0), min(row + 1, self.rows - 1) + 1):
+            first = (neighbor_row * self.cols) + first_col
+            last = (neighbor_row * self.cols) + last_col
+            slices.append(slice(self.starts[first], self.starts[last] + self.counts[last]))
+
+        return slices
+
+    def neighbors(self, cell_index):
+        return np.concatenate([self.order[row_slice] for row_slice in self.neighborRows(cell_index)])
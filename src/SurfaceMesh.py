@@ -0,0 +1,95 @@
+from OpenGL.GL import *
+import numpy as np
+import ctypes
+
+from src.GLBackend import gl
+from src.VObject import VObject
+from src.utils import MathUtils as mt
+
+class SurfaceMesh(VObject):
+
+    def __init__(self, func, lower, upper, steps = 25, color = (1.0, 1.0, 1.0), z_index = 0):
+        super().__init__()
+        if (steps < 2):
+            raise Exception("Please input at least two steps for the surface.")
+
+        self.func = func                            # f(x, y), drawn as height along the y axis
+        self.lower = lower
+        self.upper = upper
+        self.steps = steps                          # Samples along each axis
+        self.color = color
+        self.z_index = z_index
+
+    def createVertices(self):
+        axis = np.linspace(self.lower, self.upper, self.steps)
+        x, y = np.meshgrid(axis, axis, indexing="ij")
+        heights = mt.evaluateArray(self.func, x, y)
+        finite = np.isfinite(heights)
+        heights = np.where(finite, heights, 0.0)
+
+        # Per-vertex normals from the slope of the surface, facing the same way as Quad's
+        slope_x, slope_y = np.gradient(heights, axis, axis)
+        normals = np.stack([-slope_x, np.ones_like(heights), -slope_y], axis=-1)
+        normals /= np.linalg.norm(normals, axis=-1, keepdims=True)
+
+        vertices = np.empty((self.steps, self.steps, 9), dtype=np.float32)
+        vertices[..., 0] = x
+        vertices[..., 1] = heights
+        vertices[..., 2] = y
+        vertices[..., 3:6] = normals
+        vertices[..., 6:9] = self.color
+        self.normals = normals.reshape(-1, 3)
+        self.setVertices(vertices.reshape(-1, 9))
+
+        # Corners of every cell, leaving out cells that touch a point where the function is not finite
+        corner = np.arange(self.steps * self.steps, dtype=np.uint32).reshape(self.steps, self.steps)
+        cells = finite[:-1, :-1] & finite[1:, :-1] & finite[:-1, 1:] & finite[1:, 1:]
+        v0 = corner[:-1, :-1][cells]
+        v1 = corner[1:, :-1][cells]
+        v2 = corner[:-1, 1:][cells]
+        v3 = corner[1:, 1:][cells]
+        # Draw both sides, in the same order as Quad
+        self.indices = np.stack([v0, v1, v2,  v2, v1, v0,  v2, v1, v3,  v3, v1, v2], axis=1).ravel()
+
+    def instantiateGLObjects(self):
+        # Create a vertex array object (vao)
+        self.createVertexArray()
+
+        # Place the vertices in the shared vertex arena
+        offset = self.allocateVertices(9)
+
+        # Create an element buffer object (ebo) shared by every cell
+        self.ebo = gl.glGenBuffers(1)
+        gl.glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        gl.glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+        self.buffer_bytes = self.indices.nbytes
+
+        # Tell OpenGL how to interpret the vertex/color data
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 36, ctypes.c_void_p(offset))
+        # Introduce normals
+        gl.glEnableVertexAttribArray(1)
+        gl.glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 36, ctypes.c_void_p(offset + 12))
+        # Color data
+        gl.glEnableVertexAttribArray(2)
+        gl.glVertexAttribPointer(2, 3, GL_FLOAT, GL_FALSE, 36, ctypes.c_void_p(offset + 24))
+        gl.glBindVertexArray(0)
+
+    def render(self):
+        # Draw the whole surface in one call
+        gl.glDrawElements(GL_TRIANGLES, len(self.indices), GL_UNSIGNED_INT, None)
+
+    def updatePosition(self, newPosition=None):
+        pass
+
+    def animate(self, animateTo, func=None, steps=100):
+        raise Exception("Please create a new surface instead of animating one.")
+
+    def createAnimationPositions(self, steps):
+        pass
+
+    def destroy(self):
+        # Destroy vao and ebo, and give the vertices back to the arena
+        gl.glDeleteVertexArrays(1, (self.vao,))
+        gl.glDeleteBuffers(1, (self.ebo,))
+        self.releaseVertices()
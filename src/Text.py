@@ -4,6 +4,7 @@ import ctypes
 from OpenGL.GL.shaders import compileProgram, compileShader
 from OpenGL.GLU import *
 
+from src.GLBackend import gl
 from objtypes import Colors
 from src.VObject import VObject
 
@@ -19,8 +20,8 @@ class Text(VObject):
     def instantiateGLObjects(self):
         return super().instantiateGLObjects()
     
-    def draw(self):
-        return super().draw()
+    def render(self):
+        return super().render()
     
     def updatePosition(self):
         return super().updatePosition()
@@ -33,4 +34,4 @@ class Text(VObject):
     
     def destroy(self):
         # Destroy vao and vbo
-        glDeleteBuffers(0, (self.vbo,))
\ No newline at end of file
+        gl.glDeleteBuffers(0, (self.vbo,))
\ No newline at end of file
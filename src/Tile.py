@@ -4,6 +4,7 @@ import ctypes
 from OpenGL.GL.shaders import compileProgram, compileShader
 from OpenGL.GLU import *
 
+from src.GLBackend import gl
 from src.VObject import VObject
 
 class Tile(VObject):
@@ -26,18 +27,14 @@ class Tile(VObject):
             curr_vertex = [vertex[0], vertex[1], vertex[2], self.color[0], self.color[1], self.color[2]]
             vertices.append(curr_vertex)
         
-        self.vertices = np.array(vertices, dtype=np.float32)
+        self.setVertices(np.array(vertices, dtype=np.float32))
         
     def instantiateGLObjects(self):
         # Create a vertex array object (vao)
-        self.vao = glGenVertexArrays(1)
-        glBindVertexArray(self.vao)
+        self.createVertexArray()
 
-        # Create a vertex buffer object (vbo)
-        self.vbo = glGenBuffers(1)
-        flat_vertices = self.vertices.flatten()
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        glBufferData(GL_ARRAY_BUFFER, flat_vertices.nbytes, flat_vertices, GL_DYNAMIC_DRAW)
+        # Place the vertices in the shared vertex arena
+        offset = self.allocateVertices(6)
 
         # Specify indices - draw both sides
         self.indices = np.array([
@@ -48,29 +45,21 @@ class Tile(VObject):
         ], dtype=np.uint32)
         
         # Create an element buffer object (ebo)
-        self.ebo = glGenBuffers(1)
-        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
-        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_DYNAMIC_DRAW)
+        self.ebo = gl.glGenBuffers(1)
+        gl.glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+        gl.glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_DYNAMIC_DRAW)
+        self.buffer_bytes = self.indices.nbytes
 
         # Tell OpenGL how to interpret the vertex/color data
-        glEnableVertexAttribArray(0)
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset))
         # Color data
-        glEnableVertexAttribArray(1)
-        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12))
-
-    def draw(self):
-        # Bind the vao
-        glBindVertexArray(self.vao)
-        # Rebind partial buffer data in case of any updated vertices
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        flat_vertices = self.vertices.flatten()
-        glBufferSubData(GL_ARRAY_BUFFER, 0, flat_vertices.nbytes, flat_vertices)
+        gl.glEnableVertexAttribArray(1)
+        gl.glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset + 12))
 
+    def render(self):
         # Draw the Line
-        glDrawElements(GL_TRIANGLES, 12, GL_UNSIGNED_INT, None)
-        # Unbind VAO
-        glBindVertexArray(0)
+        gl.glDrawElements(GL_TRIANGLES, 12, GL_UNSIGNED_INT, None)
         
     def updatePosition(self, newPosition=None):
         return super().updatePosition(newPosition)
@@ -86,5 +75,7 @@ class Tile(VObject):
         return super().createAnimationPositions(newPosition)
 
     def destroy(self):
-        # Destroy vao and vbo
-        glDeleteBuffers(0, (self.vbo,))
\ No newline at end of file
+        # Destroy vao and ebo, and give the vertices back to the arena
+        gl.glDeleteVertexArrays(1, (self.vao,))
+        gl.glDeleteBuffers(1, (self.ebo,))
+        self.releaseVertices()
\ No newline at end of file
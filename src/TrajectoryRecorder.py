@@ -0,0 +1,142 @@
+import json
+import os
+import queue
+import struct
+import threading
+import numpy as np
+
+# Fixed size file header: magic, version, particle count, frame count, chunk size, metadata length, then JSON metadata
+MAGIC = b"PYVZTRAJ"
+VERSION = 1
+HEADER_FORMAT = "<8sIIQII"
+HEADER_SIZE = 512
+MAX_METADATA = HEADER_SIZE - struct.calcsize(HEADER_FORMAT)
+
+def frameDtype(particle_count):
+    # One fixed size record per step
+    return np.dtype([
+        ("iteration", "<i8"),
+        ("time", "<f8"),
+        ("positions", "<f4", (particle_count, 3)),
+        ("velocities", "<f4", (particle_count, 3)),
+        ("densities", "<f4", (particle_count,)),
+    ])
+
+def readHeader(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    magic, version, particle_count, frame_count, chunk_frames, metadata_length = struct.unpack_from(HEADER_FORMAT, header)
+    if (magic != MAGIC or version != VERSION):
+        raise Exception("Please input a valid trajectory file.")
+
+    offset = struct.calcsize(HEADER_FORMAT)
+    metadata = json.loads(header[offset:offset + metadata_length].decode()) if metadata_length else {}
+    return particle_count, frame_count, chunk_frames, metadata
+
+class TrajectoryRecorder:
+
+    def __init__(self, path, particle_count, chunk_frames=256, metadata=None, queue_size=64):
+        self.path = path
+        self.particle_count = particle_count
+        self.chunk_frames = chunk_frames                # The file grows by this many frames at a time
+        self.dtype = frameDtype(particle_count)
+        self.frame_count = 0
+        self.capacity = 0
+        self.frames = None                              # Memory map over the frame records
+
+        self.metadata = json.dumps(metadata or {}).encode()
+        if (len(self.metadata) > MAX_METADATA):
+            raise Exception("Please keep the trajectory metadata under " + str(MAX_METADATA) + " bytes.")
+
+        with open(self.path, "wb") as f:
+            f.write(b"\0" * HEADER_SIZE)
+        self.writeHeader()
+
+        # Frames are copied on the step loop and written by a background thread
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.writer = threading.Thread(target=self.writeFrames, daemon=True)
+        self.writer.start()
+
+    def writeHeader(self):
+        header = struct.pack(HEADER_FORMAT, MAGIC, VERSION, self.particle_count, self.frame_count, self.chunk_frames, len(self.metadata))
+        with open(self.path, "r+b") as f:
+            f.write(header + self.metadata)
+
+    def record(self, sim):
+        state = sim.getState()
+        self.recordState(state, sim.iteration, getattr(sim, "time", 0.0))
+
+    def recordState(self, state, iteration=0, time=0.0):
+        if (self.error):
+            raise self.error
+
+        frame = np.zeros((), dtype=self.dtype)
+        frame["iteration"] = iteration
+        frame["time"] = time
+        for name in ("positions", "velocities", "densities"):
+            if (name in state):
+                frame[name] = state[name]
+        self.queue.put(frame)
+
+    def grow(self):
+        # Extend the file by one chunk and map it again
+        if (self.frames is not None):
+            self.frames.flush()
+            del self.frames
+        self.capacity += self.chunk_frames
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_SIZE + (self.capacity * self.dtype.itemsize))
+        self.frames = np.memmap(self.path, dtype=self.dtype, mode="r+", offset=HEADER_SIZE, shape=(self.capacity,))
+
+    def writeFrames(self):
+        try:
+            while (True):
+                frame = self.queue.get()
+                if (frame is None):
+                    break
+                if (self.frame_count == self.capacity):
+                    self.grow()
+                self.frames[self.frame_count] = frame
+                self.frame_count += 1
+                # Publish the frame count once per chunk so readers can follow a live recording
+                if (self.frame_count % self.chunk_frames == 0):
+                    self.frames.flush()
+                    self.writeHeader()
+        except Exception as e:
+            self.error = e
+
+    def close(self):
+        self.queue.put(None)
+        self.writer.join()
+        if (self.frames is not None):
+            self.frames.flush()
+            del self.frames
+            self.frames = None
+        # Drop the unused tail of the last chunk
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_SIZE + (self.frame_count * self.dtype.itemsize))
+        self.writeHeader()
+        if (self.error):
+            raise self.error
+
+class TrajectoryReader:
+
+    def __init__(self, path):
+        self.path = path
+        self.frames = None
+        self.refresh()
+
+    def refresh(self):
+        # Map every frame the header says is complete; call again to follow a live recording
+        self.particle_count, self.frame_count, self.chunk_frames, self.metadata = readHeader(self.path)
+        dtype = frameDtype(self.particle_count)
+        available = (os.path.getsize(self.path) - HEADER_SIZE) // dtype.itemsize
+        self.frame_count = min(self.frame_count, available)
+        self.frames = np.memmap(self.path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(self.frame_count,)) if self.frame_count else None
+
+    def __len__(self):
+        return self.frame_count
+
+    def frame(self, index):
+        return self.frames[index]
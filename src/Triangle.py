@@ -4,6 +4,7 @@ import ctypes
 from OpenGL.GL.shaders import compileProgram, compileShader
 from OpenGL.GLU import *
 
+from src.GLBackend import gl
 from src.VObject import VObject
 
 class Triangle(VObject):
@@ -26,25 +27,23 @@ class Triangle(VObject):
 
     def instantiateGLObjects(self):
         # Create a vertex array object (vao)
-        self.vao = glGenVertexArrays(1)
-        glBindVertexArray(self.vao)
+        self.createVertexArray()
 
         # Create a vertex buffer object (vbo)
-        self.vbo = glGenBuffers(1)
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+        self.vbo = gl.glGenBuffers(1)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        gl.glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+        self.buffer_bytes = self.vertices.nbytes
 
         # Tell OpenGL how to interpret the vertex data
-        glEnableVertexAttribArray(0)
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
-        glEnableVertexAttribArray(1)
-        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12))
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
+        gl.glEnableVertexAttribArray(1)
+        gl.glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12))
 
-    def draw(self):
+    def render(self):
         # Draw the triangle
-        glBindVertexArray(self.vao)
-        glDrawArrays(GL_TRIANGLES, 0, self.vertex_count)
-        glBindVertexArray(0)
+        gl.glDrawArrays(GL_TRIANGLES, 0, self.vertex_count)
 
     def updatePosition(self, newPosition):
         return super().updatePosition(newPosition)
@@ -57,5 +56,5 @@ class Triangle(VObject):
 
     def destroy(self):
         # Destroy vao and vbo
-        glDeleteBuffers(0, (self.vbo,))
-        glDeleteVertexArrays(0, (self.vao,))
+        gl.glDeleteBuffers(1, (self.vbo,))
+        gl.glDeleteVertexArrays(1, (self.vao,))
@@ -0,0 +1,57 @@
+from OpenGL.GL import *
+import numpy as np
+
+from src.GLBackend import gl
+
+# The std140 block every shader shares: projection, view, then viewPos padded to a vec4
+CAMERA_BLOCK = "Camera"
+CAMERA_BINDING = 0
+CAMERA_BLOCK_SIZE = 64 + 64 + 16
+
+class UniformManager:
+
+    def __init__(self):
+        self.locations = {}                         # (program, name) -> uniform location
+        self.block = np.zeros(CAMERA_BLOCK_SIZE // 4, dtype=np.float32)    # CPU copy of the camera block
+        self.uploads = 0                            # Times the camera block was written
+
+        # One uniform buffer, bound to the same binding point for every program
+        self.ubo = gl.glGenBuffers(1)
+        gl.glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        gl.glBufferData(GL_UNIFORM_BUFFER, CAMERA_BLOCK_SIZE, None, GL_DYNAMIC_DRAW)
+        gl.glBindBufferBase(GL_UNIFORM_BUFFER, CAMERA_BINDING, self.ubo)
+        gl.glBindBuffer(GL_UNIFORM_BUFFER, 0)
+
+    def location(self, program, name):
+        # Ask the driver once per program and name
+        key = (program, name)
+        if (key not in self.locations):
+            self.locations[key] = gl.glGetUniformLocation(program, name)
+        return self.locations[key]
+
+    def attachProgram(self, program):
+        # Point the program's camera block at the shared buffer
+        index = gl.glGetUniformBlockIndex(program, CAMERA_BLOCK)
+        if (index is not None and index != GL_INVALID_INDEX):
+            gl.glUniformBlockBinding(program, index, CAMERA_BINDING)
+
+    def setMatrix(self, program, name, matrix):
+        # The program has to be in use
+        location = self.location(program, name)
+        if (location >= 0):
+            gl.glUniformMatrix4fv(location, 1, GL_FALSE, matrix)
+        else:
+            print(f"Something went wrong assigning uniform variable: {name}.")
+
+    def updateCamera(self, projection, view, view_position):
+        # pyrr matrices are already laid out the way GL reads them, so they are copied as they are
+        self.block[0:16] = np.asarray(projection, dtype=np.float32).ravel()
+        self.block[16:32] = np.asarray(view, dtype=np.float32).ravel()
+        self.block[32:35] = view_position
+        gl.glBindBuffer(GL_UNIFORM_BUFFER, self.ubo)
+        gl.glBufferSubData(GL_UNIFORM_BUFFER, 0, self.block.nbytes, self.block)
+        gl.glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        self.uploads += 1
+
+    def destroy(self):
+        gl.glDeleteBuffers(1, (self.ubo,))
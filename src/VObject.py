@@ -6,13 +6,55 @@ from OpenGL.GL.shaders import compileProgram, compileShader
 from OpenGL.GLU import *
 from abc import ABC, abstractmethod
 
+from src.GLBackend import gl
+
 class VObject(ABC):
+    primitive = GL_TRIANGLES                        # What the object's draw call renders, for grouping draws
 
     def __init__(self):
         self.animation_steps = []                   # Holds the vertex info for animation
         self.curr_step = 0                          # Keeps track of the current animation step
         self.steps = 0
         self.lines = []
+        self.arena = None                           # The vertex arena of the App the object was added to
+        self.vertex_range = None                    # This object's range in the arena
+        self.vao = None                             # Vertex array object, possibly generated by the App with others
+        self.handle = None                          # Handle in the App's scene registry
+        self.buffer_bytes = 0                       # Bytes in GL buffers the object owns outside the arena
+
+    def createVertexArray(self):
+        if (self.vao is None):
+            self.vao = gl.glGenVertexArrays(1)
+        gl.glBindVertexArray(self.vao)
+
+    def allocateVertices(self, components):
+        # Move the vertices into the arena, keep a view of them and bind the arena buffer for the vao
+        if (self.arena is None):
+            raise Exception("Please add the object to an App before instantiating its GL objects.")
+        self.vertex_range = self.arena.allocate(self.vertices.size // components, components)
+        self.vertex_range.write(self.vertices)
+        self.vertices = self.vertex_range.vertices
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vertex_range.page.vbo)
+        return self.vertex_range.offset
+
+    def setVertices(self, vertices):
+        # Once in the arena, new vertices are written into the object's range in place
+        if (self.vertex_range is not None):
+            self.vertex_range.write(vertices)
+        else:
+            self.vertices = vertices
+
+    def markVerticesDirty(self):
+        if (self.vertex_range is not None):
+            self.vertex_range.markDirty()
+
+    def releaseVertices(self):
+        # Give the range back to the arena, keeping a private copy of the vertices so updates
+        # after the object is removed can't write into memory the arena hands to another object
+        if (self.vertex_range is not None):
+            self.vertices = self.vertices.copy()
+            self.vertex_range.free()
+            self.vertex_range = None
 
     @abstractmethod
     def createVertices(self):
@@ -22,8 +64,14 @@ class VObject(ABC):
     def instantiateGLObjects(self):
         pass
 
-    @abstractmethod
     def draw(self):
+        # Bind the vao, draw and unbind; the App's render queue binds vaos itself and calls render
+        gl.glBindVertexArray(self.vao)
+        self.render()
+        gl.glBindVertexArray(0)
+
+    @abstractmethod
+    def render(self):
         pass
     
     @abstractmethod
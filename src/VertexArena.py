@@ -0,0 +1,145 @@
+from OpenGL.GL import *
+import numpy as np
+
+from src.GLBackend import gl
+
+class ArenaRange:
+    # A slice of one arena page, owned by a single object
+
+    def __init__(self, page, start, stop, components):
+        self.page = page
+        self.start = start                          # First float of the range in the page
+        self.stop = stop                            # One past the last float
+        self.components = components                # Floats per vertex
+        self.vertices = page.data[start:stop].reshape(-1, components)     # Zero-copy view into the page
+
+    @property
+    def offset(self):
+        # Byte offset of the range in the page's buffer, for glVertexAttribPointer
+        return self.start * 4
+
+    def write(self, vertices):
+        self.vertices[...] = np.reshape(vertices, self.vertices.shape)
+        self.markDirty()
+
+    def markDirty(self):
+        self.page.markDirty(self.start, self.stop)
+
+    def free(self):
+        self.page.free(self.start, self.stop)
+        if (self.page.isEmpty()):
+            self.page.arena.releasePage(self.page)
+
+class ArenaPage:
+
+    def __init__(self, arena, size):
+        self.arena = arena
+        self.size = size                            # Floats in the page
+        self.data = np.zeros(size, dtype=np.float32)
+        self.free_ranges = [(0, size)]              # Unused (start, stop) ranges, sorted by start
+        self.dirty = []                             # (start, stop) ranges written since the last upload
+        self.vbo = gl.glGenBuffers(1)
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        gl.glBufferData(GL_ARRAY_BUFFER, self.data.nbytes, None, GL_DYNAMIC_DRAW)
+
+    def allocate(self, size):
+        # First fit from the free ranges
+        for index, (start, stop) in enumerate(self.free_ranges):
+            if (stop - start >= size):
+                if (stop - start == size):
+                    del self.free_ranges[index]
+                else:
+                    self.free_ranges[index] = (start + size, stop)
+                return start
+        return None
+
+    def free(self, start, stop):
+        # Return the range and join it with its free neighbours
+        self.data[start:stop] = 0
+        self.free_ranges.append((start, stop))
+        self.free_ranges.sort()
+        merged = [self.free_ranges[0]]
+        for start, stop in self.free_ranges[1:]:
+            if (start == merged[-1][1]):
+                merged[-1] = (merged[-1][0], stop)
+            else:
+                merged.append((start, stop))
+        self.free_ranges = merged
+
+    def isEmpty(self):
+        return self.free_ranges == [(0, self.size)]
+
+    def usedFloats(self):
+        return self.size - sum(stop - start for start, stop in self.free_ranges)
+
+    def markDirty(self, start, stop):
+        self.dirty.append((start, stop))
+
+    def mergedDirty(self, gap):
+        # Overlapping ranges, or ones closer than gap floats, become one upload
+        ranges = sorted(self.dirty)
+        merged = [list(ranges[0])]
+        for start, stop in ranges[1:]:
+            if (start <= merged[-1][1] + gap):
+                merged[-1][1] = max(merged[-1][1], stop)
+            else:
+                merged.append([start, stop])
+        return merged
+
+    def upload(self, gap):
+        if (len(self.dirty) == 0):
+            return 0
+
+        gl.glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        uploaded = 0
+        for start, stop in self.mergedDirty(gap):
+            gl.glBufferSubData(GL_ARRAY_BUFFER, start * 4, (stop - start) * 4, self.data[start:stop])
+            uploaded += (stop - start) * 4
+        self.dirty = []
+        return uploaded
+
+    def destroy(self):
+        gl.glDeleteBuffers(1, (self.vbo,))
+
+class VertexArena:
+
+    def __init__(self, page_size=1 << 18, merge_gap=64):
+        self.page_size = page_size                  # Floats per page, larger allocations get a page of their own
+        self.merge_gap = merge_gap                  # Dirty ranges this many floats apart are uploaded together
+        self.pages = []
+
+    def allocate(self, vertex_count, components):
+        size = vertex_count * components
+        for page in self.pages:
+            start = page.allocate(size)
+            if (start is not None):
+                return ArenaRange(page, start, start + size, components)
+
+        page = ArenaPage(self, max(self.page_size, size))
+        self.pages.append(page)
+        start = page.allocate(size)
+        return ArenaRange(page, start, start + size, components)
+
+    def releasePage(self, page):
+        # Empty pages are deleted, except one kept for the next allocations
+        if (len(self.pages) > 1 and page in self.pages):
+            self.pages.remove(page)
+            page.destroy()
+
+    def bytes(self):
+        return sum(page.data.nbytes for page in self.pages)
+
+    def usedBytes(self):
+        return sum(page.usedFloats() * 4 for page in self.pages)
+
+    def upload(self):
+        # Send every range written since the last frame, once, and nothing else
+        uploaded = 0
+        for page in self.pages:
+            uploaded += page.upload(self.merge_gap)
+        return uploaded
+
+    def destroy(self):
+        for page in self.pages:
+            page.destroy()
+        self.pages = []
@@ -7,15 +7,23 @@ from OpenGL.GLU import *
 from abc import ABC, abstractmethod
 import pyrr
 
+from src.GLBackend import gl
 from src.GLUtils import GLUtils
 from src.Animations import Animations
 from src.Line import Line
+from src.LineBatch import LineBatch
 from src.Circle import Circle
 from src.Simulation import Simulation
 from src.Triangle import Triangle
 from src.Arrow import Arrow
 from src.Quad import Quad
+from src.SurfaceMesh import SurfaceMesh
+from src.ParticleRenderer import ParticleRenderer
 from src.Camera import Camera
+from src.FrameProfiler import FrameProfiler
+from src.VertexArena import VertexArena
+from src.SceneRegistry import SceneRegistry
+from src.RenderQueue import RenderQueue
 from src.VObject import VObject
 from src.utils import MathUtils
 from src.objtypes import Colors
@@ -24,12 +32,22 @@ class App:
 
     def __init__(self, width, height):
         # Instantiate Application
-        self.objects = []
+        self.scene = SceneRegistry()                # Every object by handle, with its z index layer
+        self.render_queue = RenderQueue()           # Draw order, grouped by program and vao
+        self.ordered_objects = []                   # Opaque objects in drawing order
+        self.translucent_objects = []               # Quads and surfaces, drawn last
+        self.ordered_layers = []                    # Opaque objects by layer, highest z index first
+        self.order_dirty = False                    # Set by adds and removes, cleared when the draw order is rebuilt
         self.sims = []
-        self.quads = []
         self.steps = 350
         self.clock = pg.time.Clock()
         self.running = True
+        self.frame_rate = 60
+        # Most simulation steps per rendered frame before the backlog is dropped
+        self.max_substeps = 8
+        # Per-phase frame timings, off until enableProfiling is called
+        self.profiler = None
+        self.profiler_overlay = False
 
         # Generate initial view matrix camera coords
         self.camera = Camera()
@@ -43,140 +61,228 @@ class App:
         # Create utils class
         self.utils = MathUtils()
 
+        # Vertices of every object, uploaded once per frame
+        self.arena = VertexArena()
+
     def createAxes3D(self, hash_length=0.12, hash_thickness=1, x_min = -10, x_max = 10, y_min = -10, y_max = 10, z_min=-10, z_max=10):
-        x_axis = Line([x_min, 0.0, 0.0], [x_max, 0.0, 0.0], thickness=3)
-        y_axis = Line([0.0, y_min, 0.0], [0.0, y_max, 0.0], thickness=3)
-        z_axis = Line([0.0, 0.0, z_min], [0.0, 0.0, z_max], thickness=3)
-        for i in range(int(x_max - x_min)):
-            x_interval = i
-            x_hash = Line([x_min + x_interval, hash_length / 2, 0.0], [x_min + x_interval, -hash_length / 2, 0.0], thickness=hash_thickness)
-            self.addObject(x_hash)
-            
-        for i in range(int(y_max - y_min)):
-            y_interval = i
-            y_hash = Line([hash_length / 2, y_min + y_interval, 0.0], [-hash_length / 2, y_min + y_interval, 0.0], thickness=hash_thickness)
-            self.addObject(y_hash)
-
-        for i in range(int(z_max - z_min)):
-            z_interval = i
-            z_hash = Line([hash_length / 2, 0.0, z_min + z_interval], [-hash_length / 2, 0.0, z_min + z_interval], thickness=hash_thickness)
-            self.addObject(z_hash)
-        
-        self.addObject(x_axis)
-        self.addObject(y_axis)
-        self.addObject(z_axis)
+        # Every axis and hash mark goes into one batch, drawn with a single call
+        axes = LineBatch()
+        x_hashes = x_min + np.arange(int(x_max - x_min), dtype=np.float32)
+        axes.addSegments(np.stack([x_hashes, np.full_like(x_hashes, hash_length / 2), np.zeros_like(x_hashes)], axis=1),
+                         np.stack([x_hashes, np.full_like(x_hashes, -hash_length / 2), np.zeros_like(x_hashes)], axis=1),
+                         thickness=hash_thickness)
+
+        y_hashes = y_min + np.arange(int(y_max - y_min), dtype=np.float32)
+        axes.addSegments(np.stack([np.full_like(y_hashes, hash_length / 2), y_hashes, np.zeros_like(y_hashes)], axis=1),
+                         np.stack([np.full_like(y_hashes, -hash_length / 2), y_hashes, np.zeros_like(y_hashes)], axis=1),
+                         thickness=hash_thickness)
+
+        z_hashes = z_min + np.arange(int(z_max - z_min), dtype=np.float32)
+        axes.addSegments(np.stack([np.full_like(z_hashes, hash_length / 2), np.zeros_like(z_hashes), z_hashes], axis=1),
+                         np.stack([np.full_like(z_hashes, -hash_length / 2), np.zeros_like(z_hashes), z_hashes], axis=1),
+                         thickness=hash_thickness)
+
+        axes.addSegment([x_min, 0.0, 0.0], [x_max, 0.0, 0.0], thickness=3)
+        axes.addSegment([0.0, y_min, 0.0], [0.0, y_max, 0.0], thickness=3)
+        axes.addSegment([0.0, 0.0, z_min], [0.0, 0.0, z_max], thickness=3)
+        self.addObject(axes)
+        return axes
 
     def createAxes2D(self, hash_length=0.12, hash_thickness=1, x_min=-10, x_max=10, y_min=-10, y_max=10):
-        x_axis = Line([x_min, 0.0, 0.0], [x_max, 0.0, 0.0], thickness=3)
-        y_axis = Line([0.0, y_min, 0.0], [0.0, y_max, 0.0], thickness=3)
-        for i in range(int(x_max - x_min)):
-            x_interval = i
-            x_hash = Line([x_min + x_interval, hash_length / 2, 0.0], [x_min + x_interval, -hash_length / 2, 0.0], thickness=hash_thickness)
-            self.addObject(x_hash)
-            
-        for i in range(int(y_max - y_min)):
-            y_interval = i
-            y_hash = Line([hash_length / 2, y_min + y_interval, 0.0], [-hash_length / 2, y_min + y_interval, 0.0], thickness=hash_thickness)
-            self.addObject(y_hash)
-
-        self.addObject(x_axis)
-        self.addObject(y_axis)
+        # Every axis and hash mark goes into one batch, drawn with a single call
+        axes = LineBatch()
+        x_hashes = x_min + np.arange(int(x_max - x_min), dtype=np.float32)
+        axes.addSegments(np.stack([x_hashes, np.full_like(x_hashes, hash_length / 2), np.zeros_like(x_hashes)], axis=1),
+                         np.stack([x_hashes, np.full_like(x_hashes, -hash_length / 2), np.zeros_like(x_hashes)], axis=1),
+                         thickness=hash_thickness)
+
+        y_hashes = y_min + np.arange(int(y_max - y_min), dtype=np.float32)
+        axes.addSegments(np.stack([np.full_like(y_hashes, hash_length / 2), y_hashes, np.zeros_like(y_hashes)], axis=1),
+                         np.stack([np.full_like(y_hashes, -hash_length / 2), y_hashes, np.zeros_like(y_hashes)], axis=1),
+                         thickness=hash_thickness)
+
+        axes.addSegment([x_min, 0.0, 0.0], [x_max, 0.0, 0.0], thickness=3)
+        axes.addSegment([0.0, y_min, 0.0], [0.0, y_max, 0.0], thickness=3)
+        self.addObject(axes)
+        return axes
 
     def addObject(self, obj):
-        if (isinstance(obj, VObject)):
-            if (isinstance(obj, Quad)):
-                self.quads.append(obj)
-            else:
-                self.objects.append(obj)
-            # Creating vertices
+        return self.addObjects([obj])[0]
+
+    def addObjects(self, objs):
+        objs = list(objs)
+        for obj in objs:
+            if (not isinstance(obj, VObject)):
+                raise Exception("Must input a valid VObject for the application.")
+
+        # Creating vertices for every object first
+        for obj in objs:
+            # Objects keep their vertices in the app's arena
+            obj.arena = self.arena
             obj.createVertices()
-            # Instantiating objects
+
+        # Generate all the vertex arrays in one call
+        if (len(objs) > 1):
+            vaos = gl.glGenVertexArrays(len(objs))
+            for obj, vao in zip(objs, vaos):
+                obj.vao = int(vao)
+
+        # Instantiating objects
+        for obj in objs:
             obj.instantiateGLObjects()
             # Check for errors
             # self._checkGLErrors()
-            # Sort the object back into the list of objects
-            self.calculatePriorities()
-        else:
-            raise Exception("Must input a valid VObject for the application.")
+
+        # Quads and surfaces are transparent and shaded, so they are drawn after everything else
+        handles = [self.scene.add(obj, translucent=isinstance(obj, (Quad, SurfaceMesh))) for obj in objs]
+        # The drawing order is rebuilt once before the next draw, not on every add
+        self.order_dirty = True
+        return handles
+
+    def enableProfiling(self, capacity=600, overlay=False):
+        # Record per-phase wall time for every frame; the overlay shows the slowest phases in the window title
+        self.profiler = FrameProfiler(capacity)
+        self.profiler_overlay = overlay
+        for sim in self.sims:
+            self.profiler.attachSimulation(sim)
+        return self.profiler
+
+    def timePhase(self, name, func, *args):
+        if (self.profiler is None):
+            return func(*args)
+        self.profiler.begin(name)
+        result = func(*args)
+        self.profiler.end(name)
+        return result
 
     def addSimulation(self, sim):
         if (isinstance(sim, Simulation)):
             sim.addApp(self)
+            if (self.profiler):
+                self.profiler.attachSimulation(sim)
             sim.Render()
             self.sims.append(sim)
         else:
             raise Exception("Please input a valid Simulation.")
 
     def removeObjects(self, objs):
+        # Takes objects or their handles, and frees their GL resources
         for obj in objs:
-            self.objects.remove(obj)
-
-    def drawFunction(self, func, lower, upper, steps=100):
-        di = (lower - upper) / steps
-        x_values = np.linspace(lower, upper, steps)
-        for i in x_values:
-            try:
-                line = Line([i, func(i), 0.0], [i + di, func(i + di), 0.0], color=(0, 0, 0), thickness=2, z_index = 1)
-                self.addObject(line)
-            except:
-                print("Out of range.")
-                pass
+            handle = obj if isinstance(obj, int) else obj.handle
+            self.scene.remove(handle).destroy()
+        # Like adds, removes only mark the drawing order for a rebuild before the next draw
+        self.order_dirty = True
+
+    def glMemory(self):
+        # Bytes held in GL buffers: the shared vertex arena plus what objects allocate themselves
+        object_bytes = sum(obj.buffer_bytes for obj in self.scene)
+        return {
+            "arena_bytes": self.arena.bytes(),
+            "arena_used_bytes": self.arena.usedBytes(),
+            "object_bytes": object_bytes,
+            "total_bytes": self.arena.bytes() + object_bytes,
+            "objects": len(self.scene),
+        }
+
+    def drawFunction(self, func, lower, upper, steps=100, tolerance=None, max_depth=6):
+        x_values = np.linspace(lower, upper, steps + 1)
+        y_values = MathUtils.evaluateArray(func, x_values)
+        finite = np.isfinite(y_values)
+        if (tolerance is None):
+            # A thousandth of the curve's height
+            span = np.ptp(y_values[finite]) if finite.any() else 0.0
+            tolerance = (span if span > 0 else 1.0) * 1e-3
+
+        # Split intervals where the midpoint strays from the straight segment, or the curve stops being finite
+        for _ in range(max_depth):
+            midpoints = (x_values[:-1] + x_values[1:]) / 2
+            y_midpoints = MathUtils.evaluateArray(func, midpoints)
+            error = np.abs(y_midpoints - ((y_values[:-1] + y_values[1:]) / 2))
+            refine = (error > tolerance) | (finite[:-1] != finite[1:])
+            if (not refine.any()):
+                break
+            intervals = np.flatnonzero(refine)
+            x_values = np.insert(x_values, intervals + 1, midpoints[intervals])
+            y_values = np.insert(y_values, intervals + 1, y_midpoints[intervals])
+            finite = np.isfinite(y_values)
+
+        # Intervals still off after refining, with the midpoint outside both ends, jump rather than curve, like tan at a pole
+        midpoints = (x_values[:-1] + x_values[1:]) / 2
+        y_midpoints = MathUtils.evaluateArray(func, midpoints)
+        unresolved = np.abs(y_midpoints - ((y_values[:-1] + y_values[1:]) / 2)) > tolerance
+        outside = (y_midpoints < np.minimum(y_values[:-1], y_values[1:])) | (y_midpoints > np.maximum(y_values[:-1], y_values[1:]))
+
+        # Only segments with both ends finite are drawn, which breaks the curve at NaN and inf
+        points = np.stack([x_values, y_values, np.zeros_like(x_values)], axis=1)
+        drawn = finite[:-1] & finite[1:] & ~(unresolved & outside)
+        # Every segment of the curve goes into one batch, drawn with a single call
+        curve = LineBatch(z_index = 1)
+        curve.addSegments(points[:-1][drawn], points[1:][drawn], colors=(0, 0, 0), thickness=2)
+        self.addObject(curve)
+        return curve
 
     def draw3DFunction(self, func, lower, upper, steps=25, normals=False):
-        di = (upper - lower) / (steps - 1)
-        x_values = np.linspace(lower, upper, steps)
-        y_values = np.linspace(lower, upper, steps)
-        for index_x, x_val in enumerate(x_values):
-            for index_y, y_val in enumerate(y_values):
-                value = func(x_val, y_val)                  # The function at the given index
-                adj_x = func(x_val + di, y_val)             # The function evaluated slightly more along the x axis
-                adj_y = func(x_val, y_val + di)             # The function evaluated slightly more along the y axis
-                adj_both = func(x_val + di, y_val + di)     # The function evaluated slightly more along both axes
-                vertices = np.array([
-                    [x_val, value, y_val],
-                    [x_val + di, adj_x, y_val],
-                    [x_val, adj_y, y_val + di,],
-                    [x_val + di, adj_both, y_val + di],
-                ], dtype=np.float32)
-                quad = Quad(vertices=vertices, color=Colors.MAGENTA.value)
-                self.addObject(quad)
-
-                # Normals
-                if (normals and (index_x + index_y) % 4 == 0):
-                    normal = np.cross(vertices[1] - vertices[0], vertices[2] - vertices[0])
-                    unit_normal = normal / np.linalg.norm(normal)
-                    normal = Arrow(start=vertices[0], end=(vertices[0] - (unit_normal * 0.5)), color=Colors.YELLOW.value)
-                    self.addObject(normal)
-
-    def runSimulations(self):
+        # The whole surface is one indexed mesh, with the function sampled once per grid point
+        surface = SurfaceMesh(func, lower, upper, steps=steps, color=Colors.MAGENTA.value)
+        self.addObject(surface)
+
+        # Normals
+        if (normals):
+            grid = np.indices((steps, steps)).reshape(2, -1)
+            shown = np.flatnonzero((grid[0] + grid[1]) % 4 == 0)
+            points = np.array(surface.vertices[shown, 0:3])
+            ends = points + (surface.normals[shown] * 0.5)
+            self.addObjects([Arrow(start=start, end=end, color=Colors.YELLOW.value) for start, end in zip(points, ends)])
+        return surface
+
+    def runSimulations(self, elapsed=None):
         for sim in self.sims:
-            sim.Update()
+            if (elapsed is None):
+                # Single step, not tied to wall time
+                sim.Update()
+                sim.Interpolate(1.0)
+                continue
+
+            # Advance by as many fixed steps as the elapsed wall time covers
+            sim.accumulator += elapsed
+            substeps = 0
+            while (sim.accumulator >= sim.deltaTime and substeps < self.max_substeps):
+                sim.Update()
+                sim.accumulator -= sim.deltaTime
+                substeps += 1
+
+            # Avoid the spiral of death: drop whatever could not be caught up this frame
+            if (substeps == self.max_substeps):
+                sim.accumulator = min(sim.accumulator, sim.deltaTime)
+
+            sim.Interpolate(sim.accumulator / sim.deltaTime)
 
     def drawObjects(self):
-        # Initialize all other objects which exist without the special shader
-        for obj in self.objects:
-            # Set shader
-            self.setShader(obj)
-            obj.updatePosition()
-            if (isinstance(obj, Arrow)):
-                length = obj.end - obj.start
-                if (np.linalg.norm(length) > 0.1):
-                    obj.draw()
-            else:
-                obj.draw()
-        # Initialize matrices
-        self.GLUtils.initMatrices()
-        # Initialize all the quads at once, which are transparent and shaded
-        for quad in self.quads:
-            self.setShader(quad)
-            quad.draw()
+        # Refresh the camera uniforms, a no-op unless the camera or viewport changed
         self.GLUtils.initMatrices()
+        # Rebuild the drawing order once if objects were added or removed since the last frame
+        self.calculatePriorities()
+        for obj in self.ordered_objects:
+            obj.updatePosition()
+        # Upload only the vertices that changed since the last frame
+        self.arena.upload()
+
+        # Draw in z order with the transparent, shaded objects last, binding programs and vaos only when they change.
+        # The queue is only sorted here, so reading objects or quads between frames never sorts it
+        if (self.render_queue.stale):
+            self.render_queue.build(self.ordered_layers, self.translucent_objects, self.programFor)
+        self.render_queue.draw()
+
+    def programFor(self, obj):
+        if (isinstance(obj, (Quad, SurfaceMesh))):
+            return self.GLUtils.translucent_shader
+        elif (isinstance(obj, ParticleRenderer)):
+            return self.GLUtils.instanced_shader
+        else:
+            return self.GLUtils.shader
 
     def setShader(self, obj):
-        if (isinstance(obj, Quad)):
-            self.GLUtils.setTranslucentShader()
-        else:
-            self.GLUtils.setDefaultShader()
+        gl.glUseProgram(self.programFor(obj))
 
     def moveCamera(self, pos, focus, animate=False):
         pos = np.array(pos, dtype=np.float32)
@@ -192,11 +298,25 @@ class App:
             self.camera.moveCamera(self.camera.camera_animation[self.camera.curr_step], self.camera.camera_focus)
             self.camera.incrementStep()
 
+    @property
+    def objects(self):
+        self.calculatePriorities()
+        return self.ordered_objects
+
+    @property
+    def quads(self):
+        self.calculatePriorities()
+        return self.translucent_objects
+
     def calculatePriorities(self):
-        def z_indexSort(obj):
-            return obj.z_index
-        
-        self.objects.sort(reverse=True, key=z_indexSort)
+        # Only rebuilds when objects were added or removed since the last time
+        if (not self.order_dirty): return
+
+        self.ordered_layers = self.scene.orderedLayers()
+        self.ordered_objects = [obj for layer in self.ordered_layers for obj in layer]
+        self.translucent_objects = self.scene.translucentObjects()
+        self.render_queue.invalidate()
+        self.order_dirty = False
 
     def handleInput(self, events):
         for event in events:
@@ -227,32 +347,45 @@ class App:
                     self.camera.spinCamera(0, -10)
 
     def run(self):
+        # Wall time of the previous frame, in seconds
+        elapsed = 0.0
+        self.clock.tick()
         while (self.running):
-            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            gl.beginFrame()
+            gl.glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
             # Handle input
-            self.handleInput(pg.event.get())
+            self.timePhase("handleInput", self.handleInput, pg.event.get())
 
             # Run any similations
-            self.runSimulations()
+            self.timePhase("runSimulations", self.runSimulations, elapsed)
 
             # Draw all objects
-            self.drawObjects()
+            self.timePhase("drawObjects", self.drawObjects)
 
             # Animate camera
-            self.animateCamera()
+            self.timePhase("animateCamera", self.animateCamera)
 
             # Refresh screen
-            pg.display.flip()
+            self.timePhase("flip", pg.display.flip)
+            gl.endFrame()
+
+            if (self.profiler):
+                self.profiler.endFrame()
+                if (self.profiler_overlay and self.profiler.frames % 30 == 0):
+                    pg.display.set_caption(f"{self.clock.get_fps():.1f} fps  {self.profiler.summary()}")
 
             # Increment the clock
-            self.clock.tick(60)
+            elapsed = self.clock.tick(self.frame_rate) / 1000
         self.quit()
     
     def destroyObjects(self):
-        for obj in self.objects:
+        for obj in self.scene:
             obj.destroy()
 
     def quit(self):
+        for sim in self.sims:
+            sim.close()
         self.destroyObjects()
+        self.arena.destroy()
         self.GLUtils.quit(self.objects)
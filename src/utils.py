@@ -14,6 +14,26 @@ class MathUtils:
     def Down():
         return np.array([0, -1.0, 0], dtype=np.float32)
 
+    def evaluateArray(func, *arrays):
+        # Call func once on whole arrays, or element by element if it only takes scalars
+        try:
+            with np.errstate(all="ignore"):
+                values = np.asarray(func(*arrays), dtype=np.float64)
+            if (values.shape == np.shape(arrays[0])):
+                return values
+        except Exception:
+            pass
+
+        def evaluate(*values):
+            # Points the function can't evaluate, like math.sqrt(-1), become NaN and are left out of the plot
+            try:
+                return func(*values)
+            except Exception:
+                return np.nan
+
+        with np.errstate(all="ignore"):
+            return np.vectorize(evaluate, otypes=[np.float64])(*arrays)
+
     def __gaussian(self, x):
         return (x * x) + 0.5
         #return np.pow(np.e, -np.pow(x + 1, 2, dtype=np.float32), dtype=np.float32) + np.pow(np.e, -np.pow(x - 1, 2, dtype=np.float32), dtype=np.float32)